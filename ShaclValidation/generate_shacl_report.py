@@ -14,9 +14,12 @@ If no output file is specified, the report is printed to stdout.
 """
 
 import argparse
+import functools
+import os
 import sys
-from collections import defaultdict
+from collections import Counter, namedtuple
 from datetime import datetime
+from itertools import product
 from pathlib import Path
 
 from rdflib import Graph, Namespace, URIRef, BNode, Literal
@@ -24,9 +27,10 @@ import pyshacl
 
 SH = Namespace("http://www.w3.org/ns/shacl#")
 SCHEMA = Namespace("http://schema.org/")
+RDF_TYPE = URIRef("http://www.w3.org/1999/02/22-rdf-syntax-ns#type")
 
-# Namespace prefixes for compact display
-NS_PREFIXES = [
+# Namespace prefixes for compact display, most frequent first
+NS_PREFIXES = (
     ("http://schema.org/", "schema:"),
     ("http://www.w3.org/ns/prov#", "prov:"),
     ("http://www.w3.org/ns/dqv#", "dqv:"),
@@ -39,13 +43,10 @@ NS_PREFIXES = [
     ("http://www.w3.org/1999/02/22-rdf-syntax-ns#", "rdf:"),
     ("http://www.w3.org/2000/01/rdf-schema#", "rdfs:"),
     ("https://cdif.org/validation/0.1/shacl#", "cdifd:"),
-]
+)
 
-SEVERITY_ORDER = {
-    SH.Violation: 0,
-    SH.Warning: 1,
-    SH.Info: 2,
-}
+# Severities in report order, most severe first
+SEVERITIES_SORTED = (SH.Violation, SH.Warning, SH.Info)
 
 SEVERITY_LABELS = {
     SH.Violation: "Violation",
@@ -56,34 +57,64 @@ SEVERITY_LABELS = {
 
 def short_uri(uri):
     """Compact a URI using known namespace prefixes."""
-    s = str(uri)
+    return _short_uri_str(str(uri))
+
+
+@functools.lru_cache(maxsize=8192)
+def _short_uri_str(s):
+    # Keyed by plain str: the same type/path URIs recur across many results
     for ns, prefix in NS_PREFIXES:
         if s.startswith(ns):
             return prefix + s[len(ns):]
     return s
 
 
+# One sh:ValidationResult, with the field names of the SPARQL projection
+#   SELECT ?result ?focus ?severity ?path ?message ?value ?constraint
+# that this replaces (path, message, value and constraint may be None)
+ResultRow = namedtuple(
+    "ResultRow", "result focus severity path message value constraint")
+
+
+def validation_results(report_graph):
+    """Yield a ResultRow per sh:ValidationResult in report_graph, read from
+    the triple index directly rather than through rdflib's SPARQL engine.
+
+    Same rows as the equivalent SPARQL query: focusNode and resultSeverity
+    are required, the rest optional, and a property with several values
+    yields one row per combination."""
+    def values(result, prop):
+        return list(report_graph.objects(result, prop))
+
+    for result in report_graph.subjects(RDF_TYPE, SH.ValidationResult):
+        focuses = values(result, SH.focusNode)
+        severities = values(result, SH.resultSeverity)
+        if not focuses or not severities:
+            continue
+        optional = [values(result, prop) or [None] for prop in (
+            SH.resultPath, SH.resultMessage, SH.value, SH.sourceConstraintComponent)]
+        for combo in product(focuses, severities, *optional):
+            yield ResultRow(result, *combo)
+
+
 def describe_focus(focus, data_graph):
     """Describe a focus node with its type and name/identifier."""
     if isinstance(focus, BNode):
-        # Get type
-        types = list(data_graph.objects(focus, URIRef("http://www.w3.org/1999/02/22-rdf-syntax-ns#type")))
-        type_str = short_uri(types[0]) if types else "unknown type"
+        # Get type (first one only)
+        rdf_type = next(data_graph.objects(focus, RDF_TYPE), None)
+        type_str = short_uri(rdf_type) if rdf_type is not None else "unknown type"
         return f"[{type_str}] (anonymous blank node)"
 
     if isinstance(focus, URIRef):
-        # Get type and name
-        types = list(data_graph.objects(focus, URIRef("http://www.w3.org/1999/02/22-rdf-syntax-ns#type")))
-        names = list(data_graph.objects(focus, SCHEMA.name))
-
-        if types and names:
-            type_str = short_uri(types[0])
-            return f'[{type_str}] "{names[0]}"'
-        elif types:
-            type_str = short_uri(types[0])
-            return f"[{type_str}] <{focus}>"
-        else:
+        # Get type and, only if typed, name
+        rdf_type = next(data_graph.objects(focus, RDF_TYPE), None)
+        if rdf_type is None:
             return f"<{focus}>"
+        type_str = short_uri(rdf_type)
+        name = next(data_graph.objects(focus, SCHEMA.name), None)
+        if name is not None:
+            return f'[{type_str}] "{name}"'
+        return f"[{type_str}] <{focus}>"
 
     return str(focus)
 
@@ -108,6 +139,11 @@ Examples:
         "-s", "--shapes", dest="shapes_opt", help="Path to SHACL shapes file (alternative)"
     )
     parser.add_argument("-o", "--output", help="Output markdown file (default: stdout)")
+    parser.add_argument(
+        "--inference", default="rdfs", choices=["none", "rdfs", "owlrl", "both"],
+        help="pyshacl inference over the data graph (default: rdfs); 'none' is "
+             "much faster when the data already carries explicit types",
+    )
     parser.add_argument("-v", "--verbose", action="store_true", help="Verbose output")
 
     args = parser.parse_args()
@@ -119,17 +155,53 @@ Examples:
         print("\nError: Both data file and shapes file are required.")
         sys.exit(1)
 
-    return data_path, shapes_path, args.output, args.verbose
+    return data_path, shapes_path, args.output, args.verbose, args.inference
 
 
-def generate_report(data_path, shapes_path, verbose=False):
+def generate_report(data_path, shapes_path, verbose=False, inference="rdfs"):
     """Run SHACL validation and return a markdown report string."""
+    return "\n".join(iter_report_lines(data_path, shapes_path, verbose, inference))
+
+
+def write_report(out, data_path, shapes_path, verbose=False, inference="rdfs"):
+    """Run SHACL validation and stream the markdown report to the text stream
+    `out` line by line (same text as generate_report). Parsing and
+    validation finish before anything is written, so a failed run leaves
+    `out` untouched."""
+    lines = iter_report_lines(data_path, shapes_path, verbose, inference)
+    first = next(lines, "")
+    out.write(first)
+    for line in lines:
+        out.write("\n")
+        out.write(line)
+
+
+# (resolved shapes path, mtime) -> parsed shapes graph, see load_shapes()
+_shapes_cache = {}
+
+
+def load_shapes(shapes_path):
+    """Parse a SHACL shapes file, reusing the graph while the file is
+    unchanged (several data files are often checked against one shapes
+    file in one process). The returned graph is shared: do not modify it."""
+    path = Path(shapes_path).resolve()
+    key = (str(path), path.stat().st_mtime_ns)
+    shapes_graph = _shapes_cache.get(key)
+    if shapes_graph is None:
+        shapes_graph = Graph()
+        shapes_graph.parse(path, format="ttl")
+        _shapes_cache[key] = shapes_graph
+    return shapes_graph
+
+
+def iter_report_lines(data_path, shapes_path, verbose=False, inference="rdfs"):
+    """Run SHACL validation and yield the markdown report lines (without
+    line terminators)."""
     # Load graphs
     data_graph = Graph()
     data_graph.parse(data_path, format="json-ld")
 
-    shapes_graph = Graph()
-    shapes_graph.parse(shapes_path, format="ttl")
+    shapes_graph = load_shapes(shapes_path)
 
     if verbose:
         print(f"Data graph: {len(data_graph)} triples", file=sys.stderr)
@@ -139,88 +211,95 @@ def generate_report(data_path, shapes_path, verbose=False):
     conforms, report_graph, report_text = pyshacl.validate(
         data_graph,
         shacl_graph=shapes_graph,
-        inference="rdfs",
+        inference=inference,
         advanced=True,
+        meta_shacl=False,
     )
 
-    # Query detailed results
-    q = """
-    PREFIX sh: <http://www.w3.org/ns/shacl#>
-    SELECT ?result ?focus ?severity ?path ?message ?value ?constraint
-    WHERE {
-        ?result a sh:ValidationResult ;
-                sh:focusNode ?focus ;
-                sh:resultSeverity ?severity .
-        OPTIONAL { ?result sh:resultPath ?path . }
-        OPTIONAL { ?result sh:resultMessage ?message . }
-        OPTIONAL { ?result sh:value ?value . }
-        OPTIONAL { ?result sh:sourceConstraintComponent ?constraint . }
-    }
-    """
-    results = list(report_graph.query(q))
-
-    # Group by severity then message
-    by_severity = defaultdict(lambda: defaultdict(list))
+    # Detailed results
+    results = list(validation_results(report_graph))
+
+    # Group by (severity, message)
+    groups = {}
+    sev_counts = Counter()
+    focus_descs = {}  # the same focus node recurs across many results
     for row in results:
         sev = row.severity
         msg = str(row.message) if row.message else "(no message)"
         path_str = short_uri(row.path) if row.path else ""
-        focus_desc = describe_focus(row.focus, data_graph)
-        by_severity[sev][msg].append((focus_desc, path_str))
+        focus_desc = focus_descs.get(row.focus)
+        if focus_desc is None:
+            focus_desc = focus_descs[row.focus] = describe_focus(row.focus, data_graph)
+        bucket = groups.get((sev, msg))
+        if bucket is None:
+            bucket = groups[(sev, msg)] = []
+        bucket.append((focus_desc, path_str))
+        sev_counts[sev] += 1
+
+    # Partition into (message, items) lists per known severity, in report order
+    by_severity = {sev: [] for sev in SEVERITIES_SORTED}
+    for (sev, msg), items in groups.items():
+        if sev in by_severity:
+            by_severity[sev].append((msg, items))
 
     # Build markdown
-    lines = []
-    lines.append("# CDIF SHACL Validation Report")
-    lines.append("")
-    lines.append(f"**Date:** {datetime.now().strftime('%Y-%m-%d %H:%M')}")
-    lines.append(f"**Data file:** {Path(data_path).as_posix()}")
-    lines.append(f"**Shapes file:** {Path(shapes_path).name}")
-    lines.append(f"**Data graph triples:** {len(data_graph)}")
-    lines.append(f"**Shapes graph triples:** {len(shapes_graph)}")
-    lines.append(f"**Conforms:** {conforms}")
-    lines.append(f"**Total issues:** {len(results)}")
-    lines.append("")
+    yield "# CDIF SHACL Validation Report"
+    yield ""
+    yield f"**Date:** {datetime.now().strftime('%Y-%m-%d %H:%M')}"
+    yield f"**Data file:** {Path(data_path).as_posix()}"
+    yield f"**Shapes file:** {Path(shapes_path).name}"
+    yield f"**Data graph triples:** {len(data_graph)}"
+    yield f"**Shapes graph triples:** {len(shapes_graph)}"
+    yield f"**Conforms:** {conforms}"
+    yield f"**Total issues:** {len(results)}"
+    yield ""
 
     # Summary table
-    lines.append("## Summary by severity")
-    lines.append("")
-    lines.append("| Severity | Count |")
-    lines.append("|----------|-------|")
-    for sev in sorted(SEVERITY_ORDER, key=SEVERITY_ORDER.get):
-        count = sum(len(items) for items in by_severity[sev].values())
-        if count > 0:
-            lines.append(f"| {SEVERITY_LABELS[sev]} | {count} |")
-    lines.append("")
+    yield "## Summary by severity"
+    yield ""
+    yield "| Severity | Count |"
+    yield "|----------|-------|"
+    for sev in SEVERITIES_SORTED:
+        if sev_counts[sev] > 0:
+            yield f"| {SEVERITY_LABELS[sev]} | {sev_counts[sev]} |"
+    yield ""
 
     # Detail sections
-    for sev in sorted(SEVERITY_ORDER, key=SEVERITY_ORDER.get):
+    for sev in SEVERITIES_SORTED:
         messages = by_severity[sev]
         if not messages:
             continue
-        total = sum(len(items) for items in messages.values())
         label = SEVERITY_LABELS[sev]
-        lines.append(f"## {label}s ({total})")
-        lines.append("")
+        yield f"## {label}s ({sev_counts[sev]})"
+        yield ""
 
-        for msg, items in sorted(messages.items(), key=lambda x: (-len(x[1]), x[0])):
-            lines.append(f"### {msg} ({len(items)})")
-            lines.append("")
+        for msg, items in sorted(messages, key=lambda x: (-len(x[1]), x[0])):
+            yield f"### {msg} ({len(items)})"
+            yield ""
             for focus_desc, path_str in items:
                 if path_str:
-                    lines.append(f"- **Focus:** {focus_desc}  **Path:** {path_str}")
+                    yield f"- **Focus:** {focus_desc}  **Path:** {path_str}"
                 else:
-                    lines.append(f"- **Focus:** {focus_desc}")
-            lines.append("")
-
-    return "\n".join(lines)
+                    yield f"- **Focus:** {focus_desc}"
+            yield ""
 
 
 if __name__ == "__main__":
-    data_path, shapes_path, output_path, verbose = parse_args()
-    report = generate_report(data_path, shapes_path, verbose)
+    data_path, shapes_path, output_path, verbose, inference = parse_args()
 
     if output_path:
-        Path(output_path).write_text(report, encoding="utf-8")
+        # Write next to the target and swap it in, so a failed run never
+        # leaves an existing report truncated
+        tmp_path = output_path + ".tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                write_report(f, data_path, shapes_path, verbose, inference)
+            os.replace(tmp_path, output_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
         print(f"Report written to {output_path}", file=sys.stderr)
     else:
-        print(report)
+        write_report(sys.stdout, data_path, shapes_path, verbose, inference)
+        print()
@@ -19,14 +19,27 @@ detected relative to this script or via the CDIF_BB_DIR environment variable.
 """
 
 import argparse
+import hashlib
+import itertools
 import os
+import re
 import sys
+import uuid
+from collections import deque
 from datetime import date
 from pathlib import Path
 
-from rdflib import Graph, Namespace, URIRef, BNode
+from rdflib import Graph, Namespace, URIRef, BNode, Literal
 from rdflib.namespace import RDF, RDFS, XSD, OWL
 
+try:
+    import pyoxigraph
+    # RdfFormat (and parse(input, format=..., base_iri=...)) arrived in
+    # pyoxigraph 0.4
+    HAS_OXIGRAPH = hasattr(pyoxigraph, "RdfFormat")
+except ImportError:
+    HAS_OXIGRAPH = False
+
 # ---------------------------------------------------------------------------
 # Namespaces
 # ---------------------------------------------------------------------------
@@ -235,20 +248,109 @@ def find_bb_dir():
     return None
 
 
+# pyoxigraph reports plain literals as typed xsd:string (RDF 1.1), so it
+# cannot tell "x" from "x"^^xsd:string; rdflib keeps the two apart
+_XSD_STRING = str(XSD.string)
+
+# Anything that may be an explicitly ^^...:string / ^^<...#string> typed
+# literal; files matching it are left to rdflib's parser
+_TYPED_STRING = re.compile(rb"\^\^\s*(?:[\w.-]*:string\b|<[^>]*#string>)")
+
+
+def parse_turtle(path, verbose=False):
+    """Parse a Turtle file into a new Graph.
+
+    Uses pyoxigraph's (compiled) Turtle parser when installed, converting
+    its terms to rdflib ones.  rdflib's own parser is used instead when
+    pyoxigraph is missing, when the file may hold an explicitly typed
+    xsd:string literal (which pyoxigraph would hand back as a plain one),
+    or when pyoxigraph rejects the file, so the merged shapes are the same
+    either way (with *verbose*, that last fallback is reported).  Blank
+    nodes get fresh ids, so graphs from several files merge cleanly.
+    """
+    if HAS_OXIGRAPH:
+        abs_path = Path(path).absolute()
+        data = abs_path.read_bytes()
+        if not _TYPED_STRING.search(data):
+            try:
+                return _parse_turtle_oxigraph(data, abs_path.as_uri())
+            except (SyntaxError, ValueError) as exc:
+                # pyoxigraph is stricter than rdflib; let rdflib have its say
+                if verbose:
+                    print(f"    pyoxigraph could not parse "
+                          f"{abs_path.parent.name}/{abs_path.name} ({exc}); "
+                          f"falling back to rdflib")
+    graph = Graph()
+    graph.parse(str(path), format="turtle")
+    return graph
+
+
+def _parse_turtle_oxigraph(data, base_iri):
+    """Parse Turtle bytes with pyoxigraph into a new rdflib Graph."""
+    graph = Graph()
+    terms = {}
+    bnode_prefix = f"n{uuid.uuid4().hex}b"
+    bnode_seq = itertools.count(1)
+
+    def term(node):
+        converted = terms.get(node)
+        if converted is None:
+            if isinstance(node, pyoxigraph.NamedNode):
+                converted = URIRef(node.value)
+            elif isinstance(node, pyoxigraph.BlankNode):
+                # Per-file prefix + sequence number, as rdflib's own parser
+                # allocates them: unique across files, and the Turtle
+                # serializer (which orders blank nodes by id) sees them in
+                # parse order, so the output is the same from run to run
+                converted = BNode(f"{bnode_prefix}{next(bnode_seq)}")
+            elif node.language:
+                converted = Literal(node.value, lang=node.language)
+            elif node.datatype.value == _XSD_STRING:
+                converted = Literal(node.value)
+            else:
+                converted = Literal(node.value,
+                                    datatype=URIRef(node.datatype.value))
+            terms[node] = converted
+        return converted
+
+    triples = pyoxigraph.parse(data, format=pyoxigraph.RdfFormat.TURTLE,
+                               base_iri=base_iri)
+    graph.addN((term(t.subject), term(t.predicate), term(t.object), graph)
+               for t in triples)
+    return graph
+
+
+def is_up_to_date(output, bb_dir, blocks):
+    """Return True if *output* exists and is newer than this script and
+    every existing rules.shacl among *blocks*."""
+    try:
+        built = output.stat().st_mtime
+    except FileNotFoundError:
+        return False
+    sources = [Path(__file__)] + [bb_dir / b / "rules.shacl" for b in blocks]
+    for path in sources:
+        try:
+            if path.stat().st_mtime >= built:
+                return False
+        except FileNotFoundError:
+            continue
+    return True
+
+
+# rdf:type values that make a subject a shape (find_named_shapes)
+_SHAPE_TYPES = frozenset((SH.NodeShape, SH.PropertyShape))
+
+
 def find_named_shapes(graph):
     """Return all named (non-blank) shape URIs defined in a graph.
 
     A named shape is a URIRef that appears as the subject of an
     ``rdf:type sh:NodeShape`` or ``rdf:type sh:PropertyShape`` triple.
     """
-    shapes = set()
-    for s in graph.subjects(RDF.type, SH.NodeShape):
-        if isinstance(s, URIRef):
-            shapes.add(s)
-    for s in graph.subjects(RDF.type, SH.PropertyShape):
-        if isinstance(s, URIRef):
-            shapes.add(s)
-    return shapes
+    return {
+        s for s, o in graph.subject_objects(RDF.type)
+        if o in _SHAPE_TYPES and isinstance(s, URIRef)
+    }
 
 
 def extract_cbd(graph, subject):
@@ -257,32 +359,36 @@ def extract_cbd(graph, subject):
     Returns all triples where *subject* is the subject, plus recursively
     all triples reachable through blank-node objects.  Named URI objects
     are **not** followed (their definitions are handled separately).
+
+    The triples come back as a list: each node is expanded once, so the
+    list has no duplicates and no set is needed.
     """
-    triples = set()
-    visited = set()
-
-    def follow(node):
-        if node in visited:
-            return
-        visited.add(node)
-        for s, p, o in graph.triples((node, None, None)):
-            triples.add((s, p, o))
-            if isinstance(o, BNode):
-                follow(o)
-
-    follow(subject)
+    triples = []
+    visited = {subject}
+    pending = [subject]
+    while pending:
+        node = pending.pop()
+        for p, o in graph.predicate_objects(node):
+            triples.append((node, p, o))
+            if isinstance(o, BNode) and o not in visited:
+                visited.add(o)
+                pending.append(o)
     return triples
 
 
+# (namespace, display prefix) pairs abbreviated by short_name
+_SHORT_PREFIXES = (
+    (str(CDIFD), "cdifd:"),
+    (str(SOSO), "soso:"),
+)
+
+
 def short_name(uri):
     """Abbreviate a CDIFD or SOSO URI for display."""
     s = str(uri)
-    prefix = "https://cdif.org/validation/0.1/shacl#"
-    if s.startswith(prefix):
-        return "cdifd:" + s[len(prefix):]
-    soso_prefix = "http://science-on-schema.org/1.2.3/validation/shacl#"
-    if s.startswith(soso_prefix):
-        return "soso:" + s[len(soso_prefix):]
+    for namespace, prefix in _SHORT_PREFIXES:
+        if s.startswith(namespace):
+            return prefix + s[len(namespace):]
     return s
 
 
@@ -290,10 +396,14 @@ def short_name(uri):
 # Merge
 # ---------------------------------------------------------------------------
 
-def merge_shapes(bb_dir, blocks, verbose=False):
+def merge_shapes(bb_dir, blocks, verbose=False, cache=None):
     """Merge building block rules.shacl files with priority-based conflict
     resolution.  The first file to define a named shape wins; later
     duplicates are skipped with a warning.
+
+    *cache*, if given, is a dict shared across calls (e.g. one per profile)
+    holding each block's parsed graph, named shapes and extracted CBDs, so
+    a file is parsed only once however many profiles include it.
     """
     merged = Graph()
     claimed = {}        # shape URI -> source file (relative path)
@@ -309,13 +419,21 @@ def merge_shapes(bb_dir, blocks, verbose=False):
                 print(f"  SKIP (not found): {block}/rules.shacl")
             continue
 
-        tmp = Graph()
-        try:
-            tmp.parse(str(shacl_path), format="turtle")
-        except Exception as exc:
-            print(f"  ERROR parsing {block}/rules.shacl: {exc}",
+        entry = cache.get(block) if cache is not None else None
+        if entry is None:
+            try:
+                tmp = parse_turtle(shacl_path, verbose)
+            except Exception as exc:
+                entry = exc
+            else:
+                entry = (tmp, find_named_shapes(tmp), {})
+            if cache is not None:
+                cache[block] = entry
+        if isinstance(entry, Exception):
+            print(f"  ERROR parsing {block}/rules.shacl: {entry}",
                   file=sys.stderr)
             continue
+        tmp, file_shapes, cbds = entry
 
         file_count += 1
         rel = block + "/rules.shacl"
@@ -323,8 +441,6 @@ def merge_shapes(bb_dir, blocks, verbose=False):
         if verbose:
             print(f"  {rel}  ({len(tmp)} triples)")
 
-        # Identify named shapes in this file
-        file_shapes = find_named_shapes(tmp)
         new_shapes = set()
         skip_shapes = set()
 
@@ -343,12 +459,14 @@ def merge_shapes(bb_dir, blocks, verbose=False):
         # Collect triples for new shapes (CBD includes blank-node trees)
         triples_to_add = set()
         for shape in new_shapes:
-            triples_to_add |= extract_cbd(tmp, shape)
-
-        added = 0
-        for triple in triples_to_add:
-            merged.add(triple)
-            added += 1
+            cbd = cbds.get(shape)
+            if cbd is None:
+                cbd = cbds[shape] = extract_cbd(tmp, shape)
+            triples_to_add.update(cbd)
+
+        # One bulk store insert per file rather than a call per triple
+        merged.addN((s, p, o, merged) for s, p, o in triples_to_add)
+        added = len(triples_to_add)
         triple_count += added
 
         if verbose and new_shapes:
@@ -381,10 +499,122 @@ def bind_prefixes(graph):
     graph.bind("soso", SOSO)
 
 
+def _nt_term(term):
+    """N-Triples form of an IRI or literal."""
+    if isinstance(term, Literal):
+        text = (str(term).replace("\\", "\\\\").replace('"', '\\"')
+                .replace("\n", "\\n").replace("\r", "\\r"))
+        if term.language:
+            return f'"{text}"@{term.language}'
+        if term.datatype:
+            return f'"{text}"^^<{term.datatype}>'
+        return f'"{text}"'
+    return f"<{term}>"
+
+
+def serialize_ntriples(graph):
+    """Serialize *graph* as N-Triples in a run-independent order.
+
+    Named subjects come first in sorted order, each followed (breadth
+    first) by the blank-node trees below it.  Triples of a subject are
+    sorted by predicate, then by object, where a blank-node object sorts
+    by a digest of its content rather than its (random) id, and blank
+    nodes are labelled ``_:b0``, ``_:b1``, ... in order of output.
+    Regenerating from unchanged sources therefore gives identical output,
+    in one pass that is much cheaper than the Turtle serializer.
+
+    Plain ``sorted(graph)`` with ``n3()`` is not used: rdflib's blank-node
+    ids are random per run, so ordering or labelling by them changes the
+    output every time, and ``n3()`` writes multi-line strings in Turtle's
+    triple-quoted form, which N-Triples does not allow.
+    """
+    digests = {}  # blank node -> digest of its content
+
+    def object_key(term):
+        if isinstance(term, BNode):
+            return digests.get(term, "[]")  # "[]": blank-node cycle
+        return _nt_term(term)
+
+    def digest_tree(root):
+        # Post-order over an explicit stack: a node's digest covers its own
+        # triples plus each blank child's digest (not the child's full
+        # text), so long rdf:first/rdf:rest lists neither recurse nor grow
+        # quadratically
+        on_path = set()
+        stack = [(root, False)]
+        while stack:
+            node, children_done = stack.pop()
+            if node in digests:
+                continue
+            if children_done:
+                on_path.discard(node)
+                text = ";".join(sorted(
+                    f"{_nt_term(p)} {object_key(o)}"
+                    for p, o in graph.predicate_objects(node)
+                ))
+                digests[node] = hashlib.sha1(text.encode("utf-8")).hexdigest()
+                continue
+            on_path.add(node)
+            stack.append((node, True))
+            for o in graph.objects(node):
+                if (isinstance(o, BNode) and o not in digests
+                        and o not in on_path):
+                    stack.append((o, False))
+
+    subjects = set(graph.subjects())
+    blank_subjects = [s for s in subjects if isinstance(s, BNode)]
+    for node in blank_subjects:
+        digest_tree(node)
+
+    labels = {}
+
+    def label(term):
+        if not isinstance(term, BNode):
+            return _nt_term(term)
+        name = labels.get(term)
+        if name is None:
+            name = labels[term] = f"_:b{len(labels)}"
+        return name
+
+    objects = {o for o in graph.objects() if isinstance(o, BNode)}
+    roots = sorted((s for s in subjects if not isinstance(s, BNode)),
+                   key=_nt_term)
+    # Blank-node subjects not hanging off any other node
+    roots += sorted((s for s in blank_subjects if s not in objects),
+                    key=object_key)
+    # Then whatever is still unreached: blank-node cycles with no root
+    unreached = sorted((s for s in blank_subjects if s in objects),
+                       key=object_key)
+
+    lines = []
+    emitted = set()
+    pending = deque()
+    for root in itertools.chain(roots, unreached):
+        if root in emitted:
+            continue
+        pending.append(root)
+        while pending:
+            subject = pending.popleft()
+            if subject in emitted:
+                continue
+            emitted.add(subject)
+            s = label(subject)
+            for p, o in sorted(graph.predicate_objects(subject),
+                               key=lambda po: (_nt_term(po[0]),
+                                               object_key(po[1]))):
+                lines.append(f"{s} {_nt_term(p)} {label(o)} .\n")
+                if isinstance(o, BNode) and o not in emitted:
+                    pending.append(o)
+    return "".join(lines)
+
+
 def make_header(stats, bb_dir, profile_label="CDIF Discovery Profile",
-                profile_name="discovery"):
-    """Return a Turtle comment block for the file header."""
+                profile_name="discovery", output_format="turtle"):
+    """Return a comment block for the file header (valid in Turtle and
+    N-Triples)."""
     today = date.today().isoformat()
+    if output_format != "turtle":
+        profile_name = f"{profile_name} --format {output_format}"
     return (
         f"# {profile_label} -- Composite SHACL Shapes\n"
         f"# Generated by generate_shacl_shapes.py --profile {profile_name} "
@@ -410,9 +640,10 @@ def main():
     )
     parser.add_argument(
         "--profile", "-p",
-        choices=list(PROFILES.keys()),
+        choices=list(PROFILES.keys()) + ["all"],
         default="discovery",
-        help="Profile to generate shapes for (default: discovery)",
+        help="Profile to generate shapes for, or 'all' to write every "
+             "profile's default output in one run (default: discovery)",
     )
     parser.add_argument(
         "--bb-dir",
@@ -425,7 +656,21 @@ def main():
         "--output", "-o",
         type=Path,
         default=None,
-        help="Output Turtle file (default: profile-specific filename)",
+        help="Output file (default: profile-specific filename, with an .nt "
+             "suffix for --format nt)",
+    )
+    parser.add_argument(
+        "--format", "-f",
+        choices=["turtle", "nt"],
+        default="turtle",
+        help="Output serialization: pretty-printed Turtle (default) or "
+             "sorted N-Triples, which is much faster to write",
+    )
+    parser.add_argument(
+        "--skip-unchanged",
+        action="store_true",
+        help="Leave an output file alone if it is newer than this script and "
+             "all of its profile's rules.shacl files",
     )
     parser.add_argument(
         "--verbose", "-v",
@@ -434,10 +679,9 @@ def main():
     )
     args = parser.parse_args()
 
-    # Resolve profile
-    profile = PROFILES[args.profile]
-    blocks = profile["blocks"]
-    output = args.output or Path(profile["default_output"])
+    names = list(PROFILES) if args.profile == "all" else [args.profile]
+    if args.output and len(names) > 1:
+        parser.error("--output cannot be combined with --profile all")
 
     # Resolve building blocks directory
     bb_dir = args.bb_dir or find_bb_dir()
@@ -449,6 +693,30 @@ def main():
         )
         sys.exit(1)
 
+    # Parsed building blocks, shared so each file is read once per run
+    cache = {}
+    for i, name in enumerate(names):
+        if i:
+            print()
+        build_profile(name, bb_dir, args.output, args.format, args.verbose,
+                      cache, skip_unchanged=args.skip_unchanged)
+
+
+def build_profile(profile_name, bb_dir, output, output_format, verbose,
+                  cache=None, skip_unchanged=False):
+    """Merge one profile's building blocks and write its shapes file."""
+    profile = PROFILES[profile_name]
+    blocks = profile["blocks"]
+    if not output:
+        output = Path(profile["default_output"])
+        if output_format == "nt":
+            output = output.with_suffix(".nt")
+
+    if skip_unchanged and is_up_to_date(output, bb_dir, blocks):
+        print(f"Profile: {profile['label']}")
+        print(f"  {output} is up to date, skipped")
+        return
+
     print(f"Profile: {profile['label']}")
     print(f"Building blocks: {bb_dir}")
     print(f"Output: {output}")
@@ -456,20 +724,33 @@ def main():
 
     # Merge
     merged, claimed, stats = merge_shapes(
-        bb_dir, blocks, verbose=args.verbose
+        bb_dir, blocks, verbose=verbose, cache=cache
     )
 
-    # Bind prefixes and serialize
-    bind_prefixes(merged)
-    turtle_str = merged.serialize(format="turtle")
     header = make_header(stats, bb_dir,
                          profile_label=profile["label"],
-                         profile_name=args.profile)
-
-    with open(output, "w", encoding="utf-8") as f:
-        f.write(header)
-        f.write("\n")
-        f.write(turtle_str)
+                         profile_name=profile_name,
+                         output_format=output_format)
+
+    # Turtle is streamed into a temp file next to the output rather than
+    # built up as one string first, then swapped in, so a failure never
+    # leaves the existing shapes file truncated (prefixes only matter for
+    # Turtle)
+    tmp_output = output.with_name(output.name + ".tmp")
+    try:
+        with open(tmp_output, "wb") as f:
+            f.write(header.encode("utf-8"))
+            f.write(b"\n")
+            if output_format == "nt":
+                f.write(serialize_ntriples(merged).encode("utf-8"))
+            else:
+                bind_prefixes(merged)
+                merged.serialize(destination=f, format="turtle",
+                                 encoding="utf-8")
+        os.replace(tmp_output, output)
+    except BaseException:
+        tmp_output.unlink(missing_ok=True)
+        raise
 
     # Summary
     print(f"\nDone: {stats['shapes']} shapes from {stats['files']} files "
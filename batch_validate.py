@@ -247,19 +247,24 @@ def main():
 
         for i, filepath in enumerate(files):
             fname = filepath.name
-            print(f"\n[{i+1}/{len(files)}] {fname}")
+            # Header goes out straight away so the file being checked is
+            # visible while the (slow) validators run; the result lines are
+            # collected and written with one call per file.
+            sys.stdout.write(f"\n[{i+1}/{len(files)}] {fname}\n")
+            sys.stdout.flush()
+            out = []
 
             # JSON Schema validation
             js_passed, js_output = run_json_schema_validation(filepath)
             if js_passed:
                 schema_pass += 1
-                print(f"  JSON Schema: PASS")
+                out.append(f"  JSON Schema: PASS")
             else:
                 schema_fail += 1
                 errors = extract_errors(js_output)
-                print(f"  JSON Schema: FAIL")
+                out.append(f"  JSON Schema: FAIL")
                 for e in errors:
-                    print(f"    {e}")
+                    out.append(f"    {e}")
 
             # SHACL validation (skip generated output files)
             sh_violations = None
@@ -267,28 +272,32 @@ def main():
             sh_infos = 0
             if any(fname.endswith(s) for s in SHACL_EXCLUDE_SUFFIXES):
                 shacl_skip += 1
-                print(f"  SHACL:       SKIP (generated output)")
+                out.append(f"  SHACL:       SKIP (generated output)")
             else:
                 sh_violations, sh_warnings, sh_infos, sh_output = run_shacl_validation(filepath)
                 if sh_violations < 0:
                     # error running validation
                     shacl_viol += 1
-                    print(f"  SHACL:       ERROR")
+                    out.append(f"  SHACL:       ERROR")
                     errors = extract_errors(sh_output)
                     for e in errors:
-                        print(f"    {e}")
+                        out.append(f"    {e}")
                 elif sh_violations > 0:
                     shacl_viol += 1
-                    print(f"  SHACL:       FAIL ({sh_violations} violations, {sh_warnings} warnings, {sh_infos} info)")
+                    out.append(f"  SHACL:       FAIL ({sh_violations} violations, {sh_warnings} warnings, {sh_infos} info)")
                     errors = extract_errors(sh_output)
                     for e in errors:
-                        print(f"    {e}")
+                        out.append(f"    {e}")
                 elif sh_warnings > 0 or sh_infos > 0:
                     shacl_warn += 1
-                    print(f"  SHACL:       PASS ({sh_warnings} warnings, {sh_infos} info)")
+                    out.append(f"  SHACL:       PASS ({sh_warnings} warnings, {sh_infos} info)")
                 else:
                     shacl_clean += 1
-                    print(f"  SHACL:       PASS (clean)")
+                    out.append(f"  SHACL:       PASS (clean)")
+
+            out.append("")
+            sys.stdout.write("\n".join(out))
+            sys.stdout.flush()
 
             shacl_skipped = any(fname.endswith(s) for s in SHACL_EXCLUDE_SUFFIXES)
             group_results.append({
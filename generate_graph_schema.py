@@ -14,11 +14,20 @@ detected relative to this script or via the CDIF_BB_DIR environment variable.
 """
 
 import argparse
-import copy
+import functools
 import json
 import os
+import re
 import sys
+from collections import Counter, deque
 from pathlib import Path
+from types import MappingProxyType
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
 
 # ---------------------------------------------------------------------------
 # Configuration: type dispatch table (ordered, most specific first)
@@ -53,8 +62,8 @@ TYPE_DISPATCH = [
     ("schema:Claim", "type-Claim"),
 ]
 
-# Mapping from building-block $ref aliases to output $defs names
-BB_REF_MAP = {
+# Mapping from building-block $ref aliases to output $defs names (read-only)
+BB_REF_MAP = MappingProxyType({
     "person": "type-Person",
     "personSchema.json": "type-Person",
     "organization": "type-Organization",
@@ -114,7 +123,37 @@ BB_REF_MAP = {
     "cdiVariableMeasuredSchema.json": "type-InstanceVariable",
     "cdifInstanceVariable": "type-InstanceVariable",
     "cdifInstanceVariableSchema.json": "type-InstanceVariable",
-}
+})
+
+# Full "#/$defs/<type>" $ref string for each BB_REF_MAP alias, built once and
+# interned so emitted refs share one string object per target
+BB_REF_STRING = MappingProxyType({
+    alias: sys.intern(f"#/$defs/{name}") for alias, name in BB_REF_MAP.items()
+})
+
+# $ref targets matched by the id-reference and def-rewriting passes
+_DEFS_PREFIX = sys.intern("#/$defs/")
+_TYPE_REF_PREFIX = sys.intern("#/$defs/type-")
+_ID_REF = sys.intern("#/$defs/id-reference")
+
+# Indentation at the start of each line of indent=2 orjson output (write_json)
+_LEADING_SPACES = re.compile(r"^ +", re.MULTILINE)
+
+
+@functools.lru_cache(maxsize=None)
+def _ref_node(def_name):
+    """Shared {"$ref": "#/$defs/<def_name>"} leaf node, one per target.
+
+    Leaf alternatives like these recur dozens of times in the hand-built
+    types. The later passes wrap them (anyOf + id-reference) or replace them
+    wholesale, and _replace_refs copies rather than edits a node whose $ref
+    it rewrites, so a single instance can sit in many places of the output
+    tree."""
+    return {"$ref": sys.intern(f"#/$defs/{def_name}")}
+
+
+# Shared bare-string alternative (same sharing rule as _ref_node)
+_STRING_NODE = {"type": "string"}
 
 # ---------------------------------------------------------------------------
 # Helpers
@@ -143,33 +182,70 @@ def find_bb_dir():
 
 
 def load_json(path):
-    """Load a JSON file, stripping BOM if present."""
+    """Load a JSON file, stripping BOM if present. Uses orjson when installed."""
+    if HAS_ORJSON:
+        data = Path(path).read_bytes()
+        if data[:3] == b"\xef\xbb\xbf":
+            data = data[3:]
+        return orjson.loads(data)
     with open(path, "r", encoding="utf-8-sig") as f:
         return json.load(f)
 
 
+def write_json(obj, path):
+    """Write obj as UTF-8 JSON in the json.dump(indent=4, ensure_ascii=False)
+    layout. Uses orjson when installed: it only indents by 2, so the leading
+    indentation of every line is doubled (JSON strings cannot hold a raw
+    newline, so leading spaces are always indentation)."""
+    if HAS_ORJSON:
+        text = orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode("utf-8")
+        text = _LEADING_SPACES.sub(lambda m: m.group(0) * 2, text)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        return
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(obj, f, indent=4, ensure_ascii=False)
+
+
+def _copy_json(obj):
+    """Deep-copy a parsed JSON tree (dicts, lists, scalars). About twice as
+    fast as copy.deepcopy, which memoizes and dispatches per object."""
+    if isinstance(obj, dict):
+        return {key: _copy_json(value) for key, value in obj.items()}
+    if isinstance(obj, list):
+        return [_copy_json(item) for item in obj]
+    return obj
+
+
 def resolve_ref_path(ref_str, base_dir):
     """Resolve a relative file $ref to an absolute path."""
     if ref_str.startswith("#"):
         return None  # internal ref
     # Strip any JSON pointer suffix after the filename
-    file_part = ref_str.split("#")[0]
-    return (base_dir / file_part).resolve()
+    return _resolved_path(base_dir, ref_str.partition("#")[0])
 
 
-def ref_to_bb_name(ref_str):
-    """Extract the building block name from a $ref path."""
-    file_part = ref_str.split("#")[0]
-    basename = Path(file_part).name
-    return basename
+@functools.lru_cache(maxsize=None)
+def _resolved_path(base_dir, file_part):
+    """Memoized (base_dir / file_part).resolve(); resolve() stats each path
+    component, and the same relative refs recur across building blocks."""
+    return (base_dir / file_part).resolve()
 
 
 def is_external_bb_ref(ref_str):
     """Check if a $ref points to an external building block schema file."""
     if ref_str.startswith("#"):
         return False
-    file_part = ref_str.split("#")[0]
-    return file_part.endswith("Schema.json")
+    return ref_str.partition("#")[0].endswith("Schema.json")
+
+
+def _dispatch_ref(ref_str):
+    """Return the "#/$defs/<type>" $ref an external BB $ref maps to via
+    BB_REF_MAP, or None if it is internal, not a BB schema file, or unmapped."""
+    file_part = ref_str.partition("#")[0]
+    if not file_part.endswith("Schema.json"):
+        return None
+    return BB_REF_STRING.get(file_part.rpartition("/")[2].rpartition("\\")[2])
 
 
 def is_yaml_ref(ref_str):
@@ -182,7 +258,7 @@ def is_yaml_ref(ref_str):
     them to a permissive object so the schema stays valid and accepts
     both inline objects and {@id} cross-references.
     """
-    return ".yaml" in ref_str.split("#")[0]
+    return ".yaml" in ref_str.partition("#")[0]
 
 
 def is_internal_type_ref(ref_str):
@@ -195,107 +271,236 @@ def is_internal_type_ref(ref_str):
 # ---------------------------------------------------------------------------
 
 class SchemaLoader:
-    """Loads and caches building block schemas."""
+    """Loads and caches building block schemas.
+
+    Cached schemas are shared, not copied: callers must treat the returned
+    object as read-only. resolve_and_transform() never mutates its input and
+    always builds fresh containers, so the usual load -> resolve pipeline is
+    safe; builders that edit a raw loaded schema copy it first.
+    """
 
     def __init__(self, bb_dir):
         self.bb_dir = Path(bb_dir)
         self._cache = {}
+        # (id(loaded schema), base_dir) -> transformed result, filled by
+        # resolve_and_transform for inline-resolved subschemas
+        self._resolved_cache = {}
+        # rel_path -> resolved top-level building block (see resolve())
+        self._type_cache = {}
+        # ids of containers holding an external $ref somewhere beneath them,
+        # across every tree scanned so far (see external_ref_ids())
+        self._external_ids = set()
+        # id(root) -> root for scanned trees; holding the roots keeps the
+        # recorded ids valid for the loader's lifetime
+        self._scanned = {}
+        # abs path -> Path.is_file() result (see is_file())
+        self._is_file = {}
 
     def load(self, rel_path):
         """Load a schema by relative path from bb_dir."""
-        abs_path = (self.bb_dir / rel_path).resolve()
-        return self._load_abs(abs_path)
+        return self._load_abs(_resolved_path(self.bb_dir, rel_path))
+
+    def resolve(self, rel_path):
+        """Return a private copy of the schema at rel_path with its external
+        $refs resolved (resolve_and_transform) and $schema dropped. Each
+        building block is resolved once per loader; several builders share
+        e.g. dataDownload.
+        """
+        if rel_path not in self._type_cache:
+            path = _resolved_path(self.bb_dir, rel_path)
+            self._type_cache[rel_path] = strip_schema_key(resolve_and_transform(
+                self.load(rel_path), path.parent, self, source=path))
+        return _copy_json(self._type_cache[rel_path])
+
+    def external_ref_ids(self, root):
+        """Return the ids of the dicts/lists under root (inclusive) that
+        contain an external $ref. Each tree is scanned once per loader."""
+        if id(root) not in self._scanned:
+            self._scanned[id(root)] = root
+            self._external_ids.update(_external_ref_nodes(root))
+        return self._external_ids
+
+    def is_file(self, abs_path):
+        """Path.is_file(), checked on disk once per path per loader (the
+        same $ref target recurs across building blocks)."""
+        result = self._is_file.get(abs_path)
+        if result is None:
+            result = self._is_file[abs_path] = abs_path.is_file()
+        return result
 
     def _load_abs(self, abs_path):
         key = str(abs_path)
         if key not in self._cache:
             self._cache[key] = load_json(abs_path)
-        return copy.deepcopy(self._cache[key])
+        return self._cache[key]
 
 
 # ---------------------------------------------------------------------------
 # Phase 2: Resolve external $refs and transform
 # ---------------------------------------------------------------------------
 
-def resolve_and_transform(schema, base_dir, loader, depth=0):
+def resolve_and_transform(schema, base_dir, loader, source=None):
     """
-    Recursively walk a schema, resolving external file $refs.
+    Walk a schema, resolving external file $refs.
 
     - External BB refs → replaced with {"$ref": "#/$defs/<type-name>"} + id-reference alternative
     - Internal $defs that are external refs → resolved and inlined
     - Everything else left in place
+
+    source is the schema's own file, if known. A file ref back to a file
+    that is already being inlined on the current descent (a cycle between
+    non-dispatched files) is cut with a permissive {"type": "object"}.
+
+    The input is never mutated; loader-cached subtrees are copied, not shared.
+    Iterative: each worklist entry is (container, slot, node, base_dir,
+    inlining) where inlining is the frozenset of files open on the descent,
+    and the transformed node is written into container[slot]. Slots are
+    pre-filled in source order so output key order matches the input.
+
+    Inline-resolved subschemas are memoized on the loader: a marker entry
+    (container None) is pushed beneath each one and, once popped, its
+    finished result is cached unless a cycle was cut inside it (the result
+    then depends on the descent that reached it).
     """
-    if depth > 20:
-        return schema
+    resolved_cache = loader._resolved_cache
+    external = loader.external_ref_ids(schema)
+    cycle_cuts = 0
+
+    def push_loaded(parent, slot, loaded, ref_path, inlining):
+        nonlocal cycle_cuts
+        if str(ref_path) in inlining:
+            cycle_cuts += 1
+            parent[slot] = {"type": "object"}
+            return
+        key = (id(loaded), ref_path.parent)
+        if key not in resolved_cache \
+                and id(loaded) not in loader.external_ref_ids(loaded):
+            # Nothing to resolve: the transformed form is the loaded schema
+            # itself, so cache it as-is instead of walking it.
+            resolved_cache[key] = loaded
+        if key in resolved_cache:
+            parent[slot] = _copy_json(resolved_cache[key])
+            return
+        stack.append((None, (parent, slot, key, cycle_cuts), None, None, None))
+        stack.append((parent, slot, loaded, ref_path.parent,
+                      inlining | {str(ref_path)}))
+
+    root = [None]
+    start = frozenset() if source is None else frozenset([str(source)])
+    stack = [(root, 0, schema, base_dir, start)]
+    while stack:
+        parent, slot, node, node_dir, inlining = stack.pop()
+
+        if parent is None:
+            memo_parent, memo_slot, key, cuts_before = slot
+            if cycle_cuts == cuts_before:
+                resolved_cache[key] = _copy_json(memo_parent[memo_slot])
+            continue
 
-    if isinstance(schema, list):
-        return [resolve_and_transform(item, base_dir, loader, depth + 1) for item in schema]
+        if id(node) not in external:
+            # No external $ref anywhere beneath: the transform would rebuild
+            # the subtree unchanged, so copy it in one go instead of walking it.
+            parent[slot] = _copy_json(node)
+            continue
 
-    if not isinstance(schema, dict):
-        return schema
+        if isinstance(node, list):
+            out = [None] * len(node)
+            parent[slot] = out
+            for i, item in enumerate(node):
+                stack.append((out, i, item, node_dir, inlining))
+            continue
 
-    # Handle $ref. In JSON Schema 2020-12 a $ref may carry sibling keywords
-    # (e.g. "description"); the restructured BB schemas do this, so do NOT
-    # require $ref to be the sole key. Internal (#/...) refs fall through to
-    # generic processing so their siblings are still walked.
-    if "$ref" in schema and isinstance(schema["$ref"], str) \
-            and not schema["$ref"].startswith("#"):
-        ref = schema["$ref"]
-        if is_yaml_ref(ref):
-            # Advanced .yaml-defined sub-structure (value domain, statistics,
-            # concept, data structure). Permissive: accept inline object or
-            # {@id} reference. (Sibling description, if any, is dropped.)
-            return {"type": "object"}
-        if is_external_bb_ref(ref):
-            bb_name = ref_to_bb_name(ref)
-            if bb_name in BB_REF_MAP:
-                return {"$ref": f"#/$defs/{BB_REF_MAP[bb_name]}"}
-            else:
-                # Resolve inline: load and recursively process
-                ref_path = resolve_ref_path(ref, base_dir)
-                if ref_path and ref_path.is_file():
-                    loaded = loader._load_abs(ref_path)
-                    return resolve_and_transform(loaded, ref_path.parent, loader, depth + 1)
-        return schema
+        if not isinstance(node, dict):
+            parent[slot] = node
+            continue
+
+        # Handle $ref. In JSON Schema 2020-12 a $ref may carry sibling keywords
+        # (e.g. "description"); the restructured BB schemas do this, so do NOT
+        # require $ref to be the sole key. Internal (#/...) refs fall through to
+        # generic processing so their siblings are still walked.
+        if "$ref" in node and isinstance(node["$ref"], str) \
+                and not node["$ref"].startswith("#"):
+            ref = node["$ref"]
+            if is_yaml_ref(ref):
+                # Advanced .yaml-defined sub-structure (value domain, statistics,
+                # concept, data structure). Permissive: accept inline object or
+                # {@id} reference. (Sibling description, if any, is dropped.)
+                parent[slot] = {"type": "object"}
+                continue
+            target = _dispatch_ref(ref)
+            if target is not None:
+                parent[slot] = {"$ref": target}
+                continue
+            if is_external_bb_ref(ref):
+                # Resolve inline: load and process in this slot
+                ref_path = resolve_ref_path(ref, node_dir)
+                if ref_path and loader.is_file(ref_path):
+                    push_loaded(parent, slot, loader._load_abs(ref_path),
+                                ref_path, inlining)
+                    continue
+            parent[slot] = _copy_json(node)
+            continue
 
-    result = {}
-    for key, value in schema.items():
-        if key == "$defs":
+        out = {}
+        parent[slot] = out
+        for key, value in node.items():
+            if key != "$defs":
+                out[key] = None
+                stack.append((out, key, value, node_dir, inlining))
+                continue
             # Process $defs: resolve external refs within them
             new_defs = {}
+            out[key] = new_defs
             for def_name, def_schema in value.items():
+                new_defs[def_name] = None
                 if isinstance(def_schema, dict) and "$ref" in def_schema and len(def_schema) == 1:
                     ref = def_schema["$ref"]
                     if is_yaml_ref(ref):
                         new_defs[def_name] = {"type": "object"}
-                    elif is_external_bb_ref(ref):
-                        bb_name = ref_to_bb_name(ref)
-                        if bb_name in BB_REF_MAP:
-                            # This $def just redirects to a building block;
-                            # we'll replace usages with the type-level $ref
-                            new_defs[def_name] = {"$ref": f"#/$defs/{BB_REF_MAP[bb_name]}"}
+                        continue
+                    target = _dispatch_ref(ref)
+                    if target is not None:
+                        # This $def just redirects to a building block;
+                        # we'll replace usages with the type-level $ref
+                        new_defs[def_name] = {"$ref": target}
+                        continue
+                    if is_external_bb_ref(ref):
+                        ref_path = resolve_ref_path(ref, node_dir)
+                        if ref_path and loader.is_file(ref_path):
+                            push_loaded(new_defs, def_name, loader._load_abs(ref_path),
+                                        ref_path, inlining)
                         else:
-                            ref_path = resolve_ref_path(ref, base_dir)
-                            if ref_path and ref_path.is_file():
-                                loaded = loader._load_abs(ref_path)
-                                new_defs[def_name] = resolve_and_transform(
-                                    loaded, ref_path.parent, loader, depth + 1
-                                )
-                            else:
-                                new_defs[def_name] = def_schema
-                    else:
-                        new_defs[def_name] = resolve_and_transform(
-                            def_schema, base_dir, loader, depth + 1
-                        )
-                else:
-                    new_defs[def_name] = resolve_and_transform(
-                        def_schema, base_dir, loader, depth + 1
-                    )
-            result[key] = new_defs
-        else:
-            result[key] = resolve_and_transform(value, base_dir, loader, depth + 1)
-
-    return result
+                            new_defs[def_name] = _copy_json(def_schema)
+                        continue
+                stack.append((new_defs, def_name, def_schema, node_dir, inlining))
+
+    return root[0]
+
+
+def _external_ref_nodes(root):
+    """Return the ids of the dicts/lists in root that contain, at any depth,
+    a $ref pointing outside the document (file or .yaml ref)."""
+    found = set()
+    # Post-order: (node, children_done); a container is marked once any of
+    # its children is, or when it carries an external $ref itself.
+    stack = [(root, False)]
+    while stack:
+        node, done = stack.pop()
+        if done:
+            children = node.values() if isinstance(node, dict) else node
+            if any(id(c) in found for c in children if isinstance(c, (dict, list))):
+                found.add(id(node))
+            continue
+        if isinstance(node, dict):
+            ref = node.get("$ref")
+            if isinstance(ref, str) and not ref.startswith("#"):
+                found.add(id(node))
+            stack.append((node, True))
+            stack.extend((v, False) for v in node.values() if isinstance(v, (dict, list)))
+        elif isinstance(node, list):
+            stack.append((node, True))
+            stack.extend((v, False) for v in node if isinstance(v, (dict, list)))
+    return found
 
 
 def flatten_local_defs(schema):
@@ -306,38 +511,63 @@ def flatten_local_defs(schema):
     if "$defs" not in schema:
         return schema
 
-    # Find local $defs that are simple redirects to root $defs
+    # Split local $defs into simple redirects to root $defs and everything else
     redirects = {}
-    for name, defn in list(schema.get("$defs", {}).items()):
-        if isinstance(defn, dict) and "$ref" in defn and defn["$ref"].startswith("#/$defs/type-"):
+    kept = {}
+    for name, defn in schema["$defs"].items():
+        if isinstance(defn, dict) and "$ref" in defn and defn["$ref"].startswith(_TYPE_REF_PREFIX):
             redirects[f"#/$defs/{name}"] = defn["$ref"]
+        else:
+            kept[name] = defn
 
     if not redirects:
         return schema
 
-    # Remove redirect $defs
-    for name in list(schema.get("$defs", {}).keys()):
-        if f"#/$defs/{name}" in redirects:
-            del schema["$defs"][name]
-
-    # Clean up empty $defs
-    if not schema.get("$defs"):
+    # Drop the redirect $defs (and $defs itself if nothing else remains)
+    if kept:
+        schema["$defs"] = kept
+    else:
         del schema["$defs"]
 
     # Replace references throughout the schema
     return _replace_refs(schema, redirects)
 
 
-def _replace_refs(obj, mapping):
-    """Replace $ref values according to mapping dict."""
-    if isinstance(obj, list):
-        return [_replace_refs(item, mapping) for item in obj]
-    if not isinstance(obj, dict):
-        return obj
-    if "$ref" in obj and obj["$ref"] in mapping:
-        obj["$ref"] = mapping[obj["$ref"]]
-    for key in obj:
-        obj[key] = _replace_refs(obj[key], mapping)
+def _replace_refs(obj, *mappings):
+    """Replace $ref values according to mapping dicts. With several mappings,
+    each is applied in turn to the result of the previous one.
+
+    obj itself is edited in place, but a nested dict whose $ref changes is
+    swapped for an edited copy in its parent rather than modified, so the
+    shared leaf nodes (_ref_node, _STRING_NODE) can never be rewritten for
+    every type at once by one type's mapping."""
+    def mapped(ref):
+        for mapping in mappings:
+            ref = mapping.get(ref, ref)
+        return ref
+
+    if isinstance(obj, dict):
+        ref = obj.get("$ref")
+        if isinstance(ref, str):
+            new_ref = mapped(ref)
+            if new_ref is not ref:
+                obj["$ref"] = new_ref
+    stack = [obj]
+    while stack:
+        node = stack.pop()
+        for key, child in (node.items() if isinstance(node, dict)
+                           else enumerate(node)):
+            if isinstance(child, dict):
+                ref = child.get("$ref")
+                if isinstance(ref, str):
+                    new_ref = mapped(ref)
+                    if new_ref is not ref:
+                        child = dict(child)
+                        child["$ref"] = new_ref
+                        node[key] = child
+                stack.append(child)
+            elif isinstance(child, list):
+                stack.append(child)
     return obj
 
 
@@ -349,18 +579,61 @@ def add_id_reference_alternatives(schema):
     """
     Walk the schema and add id-reference alternatives wherever a property
     references a type definition.
+
+    Subtrees without any `#/$defs/type-` ref are left untouched by the walk,
+    so a pre-scan collects them (by id) and the walk skips them.
     """
+    ref_free, _keepalive = _type_ref_free_nodes(schema)
+    return _add_id_refs(schema, ref_free)
+
+
+def _type_ref_free_nodes(schema):
+    """Return (ids, nodes) for every dict/list in schema whose subtree holds
+    no `#/$defs/type-` $ref. `nodes` keeps them alive so ids stay unique
+    while the caller rewrites the tree."""
+    ref_free = set()
+    nodes = []
+    has_ref = {}
+    stack = [(schema, False)]
+    while stack:
+        node, children_done = stack.pop()
+        if isinstance(node, dict):
+            children = node.values()
+        elif isinstance(node, list):
+            children = node
+        else:
+            continue
+        if not children_done:
+            stack.append((node, True))
+            stack.extend((c, False) for c in children if isinstance(c, (dict, list)))
+            continue
+        found = any(has_ref.get(id(c), False) for c in children
+                    if isinstance(c, (dict, list)))
+        if not found and isinstance(node, dict):
+            ref = node.get("$ref")
+            found = isinstance(ref, str) and ref.startswith(_TYPE_REF_PREFIX)
+        has_ref[id(node)] = found
+        if not found:
+            ref_free.add(id(node))
+            nodes.append(node)
+    return ref_free, nodes
+
+
+def _add_id_refs(schema, ref_free):
+    if id(schema) in ref_free:
+        return schema
     if isinstance(schema, list):
-        return [add_id_reference_alternatives(item) for item in schema]
+        return [_add_id_refs(item, ref_free) for item in schema]
     if not isinstance(schema, dict):
         return schema
 
-    # Process properties
+    # Process properties: add the alternative, then walk the result
     if "properties" in schema and isinstance(schema["properties"], dict):
-        for prop_name, prop_schema in schema["properties"].items():
+        props = schema["properties"]
+        for prop_name, prop_schema in props.items():
             if prop_name.startswith("@"):
                 continue  # skip @id, @type, @context
-            schema["properties"][prop_name] = _add_id_ref_to_property(prop_schema)
+            props[prop_name] = _add_id_refs(_add_id_ref_to_property(prop_schema), ref_free)
 
     # Process items
     if "items" in schema:
@@ -369,46 +642,52 @@ def add_id_reference_alternatives(schema):
     # Recurse into sub-schemas
     for key in ["allOf", "anyOf", "oneOf"]:
         if key in schema:
-            schema[key] = [add_id_reference_alternatives(item) for item in schema[key]]
+            schema[key] = [_add_id_refs(item, ref_free) for item in schema[key]]
 
     if "if" in schema:
-        schema["if"] = add_id_reference_alternatives(schema["if"])
+        schema["if"] = _add_id_refs(schema["if"], ref_free)
     if "then" in schema:
-        schema["then"] = add_id_reference_alternatives(schema["then"])
+        schema["then"] = _add_id_refs(schema["then"], ref_free)
     if "else" in schema:
-        schema["else"] = add_id_reference_alternatives(schema["else"])
+        schema["else"] = _add_id_refs(schema["else"], ref_free)
 
-    for key in ["properties", "additionalProperties", "patternProperties"]:
+    for key in ["additionalProperties", "patternProperties"]:
         if key in schema and isinstance(schema[key], dict):
             for k, v in schema[key].items():
                 if k.startswith("@"):
                     continue
-                schema[key][k] = add_id_reference_alternatives(v)
+                schema[key][k] = _add_id_refs(v, ref_free)
 
     return schema
 
 
+def _scan_alternatives(items):
+    """One pass over an anyOf/oneOf list: (has type-* $ref, has id-reference $ref)."""
+    has_type_ref = has_id_ref = False
+    for item in items:
+        if isinstance(item, dict) and "$ref" in item:
+            ref = item["$ref"]
+            if ref == _ID_REF:
+                has_id_ref = True
+            elif ref.startswith(_TYPE_REF_PREFIX):
+                has_type_ref = True
+    return has_type_ref, has_id_ref
+
+
 def _add_id_ref_to_property(prop):
     """Add id-reference alternative to a property that references a type."""
     if not isinstance(prop, dict):
         return prop
 
-    id_ref = {"$ref": "#/$defs/id-reference"}
+    id_ref = _ref_node("id-reference")
 
     # Direct $ref to a type
-    if "$ref" in prop and prop["$ref"].startswith("#/$defs/type-"):
+    if "$ref" in prop and prop["$ref"].startswith(_TYPE_REF_PREFIX):
         return {"anyOf": [prop, id_ref]}
 
     # anyOf already containing a type $ref - add id-reference if not present
     if "anyOf" in prop:
-        has_type_ref = any(
-            isinstance(item, dict) and "$ref" in item and item["$ref"].startswith("#/$defs/type-")
-            for item in prop["anyOf"]
-        )
-        has_id_ref = any(
-            isinstance(item, dict) and "$ref" in item and item["$ref"] == "#/$defs/id-reference"
-            for item in prop["anyOf"]
-        )
+        has_type_ref, has_id_ref = _scan_alternatives(prop["anyOf"])
         if has_type_ref and not has_id_ref:
             prop["anyOf"].append(id_ref)
         # Do NOT recurse into individual anyOf items when this anyOf already
@@ -420,17 +699,10 @@ def _add_id_ref_to_property(prop):
 
     # oneOf containing a type $ref
     if "oneOf" in prop:
-        has_type_ref = any(
-            isinstance(item, dict) and "$ref" in item and item["$ref"].startswith("#/$defs/type-")
-            for item in prop["oneOf"]
-        )
+        has_type_ref, has_id_ref = _scan_alternatives(prop["oneOf"])
         if has_type_ref:
             # Convert oneOf to anyOf and add id-reference
             items = prop.pop("oneOf")
-            has_id_ref = any(
-                isinstance(item, dict) and "$ref" in item and item["$ref"] == "#/$defs/id-reference"
-                for item in items
-            )
             if not has_id_ref:
                 items.append(id_ref)
             prop["anyOf"] = items
@@ -472,7 +744,7 @@ def relax_type_property(schema):
         already = (isinstance(original, dict)
                    and (original.get("type") == "string" or "anyOf" in original))
         if not already:
-            props["@type"] = {"anyOf": [{"type": "string"}, original]}
+            props["@type"] = {"anyOf": [_STRING_NODE, original]}
 
     # Recurse into all sub-schema positions.
     for key in ("properties", "patternProperties", "$defs"):
@@ -497,7 +769,7 @@ def ensure_id_property(schema):
     if "properties" not in schema:
         schema["properties"] = {}
     if "@id" not in schema["properties"]:
-        schema["properties"]["@id"] = {"type": "string"}
+        schema["properties"]["@id"] = _STRING_NODE
     return schema
 
 
@@ -523,41 +795,24 @@ def strip_context(schema):
 # Build each type definition
 # ---------------------------------------------------------------------------
 
-def build_type_person(loader, bb_dir):
-    """Build type-Person definition."""
-    schema = loader.load("schemaorgProperties/person/personSchema.json")
-    base_dir = bb_dir / "schemaorgProperties" / "person"
-    schema = resolve_and_transform(schema, base_dir, loader)
-    schema = flatten_local_defs(schema)
-    schema = strip_schema_key(schema)
-    schema = ensure_id_property(schema)
-    return schema
-
-
-def build_type_organization(loader, bb_dir):
-    """Build type-Organization definition."""
-    schema = loader.load("schemaorgProperties/organization/organizationSchema.json")
-    base_dir = bb_dir / "schemaorgProperties" / "organization"
-    schema = resolve_and_transform(schema, base_dir, loader)
+def build_standard_type(loader, rel_path, post=None):
+    """Build a type definition from a single building block: resolve external
+    $refs, flatten local redirect $defs, drop $schema, ensure @id. `post`
+    applies any per-type edits to the result."""
+    schema = loader.resolve(rel_path)
     schema = flatten_local_defs(schema)
-    schema = strip_schema_key(schema)
     schema = ensure_id_property(schema)
+    if post is not None:
+        schema = post(schema)
     return schema
 
 
-def build_type_identifier(loader, bb_dir):
-    """Build type-Identifier definition. Add cdi:Identifier to @type."""
-    schema = loader.load("schemaorgProperties/identifier/identifierSchema.json")
-    base_dir = bb_dir / "schemaorgProperties" / "identifier"
-    schema = resolve_and_transform(schema, base_dir, loader)
-    schema = flatten_local_defs(schema)
-    schema = strip_schema_key(schema)
-    schema = ensure_id_property(schema)
-
+def _identifier_post(schema):
+    """type-Identifier: add cdi:Identifier to @type."""
     # Modify @type to be array containing both schema:PropertyValue and cdi:Identifier
     schema["properties"]["@type"] = {
         "type": "array",
-        "items": {"type": "string"},
+        "items": _STRING_NODE,
         "allOf": [
             {"contains": {"const": "schema:PropertyValue"}},
             {"contains": {"const": "cdi:Identifier"}}
@@ -566,52 +821,38 @@ def build_type_identifier(loader, bb_dir):
     return schema
 
 
-def build_type_defined_term(loader, bb_dir):
-    """Build type-DefinedTerm definition."""
-    schema = loader.load("schemaorgProperties/definedTerm/definedTermSchema.json")
-    base_dir = bb_dir / "schemaorgProperties" / "definedTerm"
-    schema = resolve_and_transform(schema, base_dir, loader)
-    schema = flatten_local_defs(schema)
-    schema = strip_schema_key(schema)
-    schema = ensure_id_property(schema)
-    return schema
-
-
-def build_type_creative_work(loader, bb_dir):
-    """Build type-CreativeWork (labeled link) definition."""
-    schema = loader.load("schemaorgProperties/labeledLink/labeledLinkSchema.json")
-    base_dir = bb_dir / "schemaorgProperties" / "labeledLink"
-    schema = resolve_and_transform(schema, base_dir, loader)
-    schema = flatten_local_defs(schema)
-    schema = strip_schema_key(schema)
-    schema = ensure_id_property(schema)
-    return schema
-
-
-def build_type_data_download(loader, bb_dir):
-    """Build type-DataDownload definition with optional hasPart for archives."""
-    schema = loader.load("schemaorgProperties/dataDownload/dataDownloadSchema.json")
-    base_dir = bb_dir / "schemaorgProperties" / "dataDownload"
-    schema = resolve_and_transform(schema, base_dir, loader)
-    schema = flatten_local_defs(schema)
-    schema = strip_schema_key(schema)
-    schema = ensure_id_property(schema)
-
+def _data_download_post(schema):
+    """type-DataDownload: optional hasPart for archives."""
     # Add optional hasPart for archive support (references MediaObject by @id)
     schema["properties"]["schema:hasPart"] = {
         "type": "array",
         "description": "Component files in an archive distribution.",
         "items": {
             "anyOf": [
-                {"$ref": "#/$defs/type-MediaObject"},
-                {"$ref": "#/$defs/id-reference"}
+                _ref_node("type-MediaObject"),
+                _ref_node("id-reference")
             ]
         }
     }
 
     # Add optional schema:description
     if "schema:description" not in schema.get("properties", {}):
-        schema["properties"]["schema:description"] = {"type": "string"}
+        schema["properties"]["schema:description"] = _STRING_NODE
+
+    return schema
+
+
+def _web_api_post(schema):
+    """type-WebAPI: potentialAction items should allow id-reference."""
+    if "schema:potentialAction" in schema.get("properties", {}):
+        pa = schema["properties"]["schema:potentialAction"]
+        if "items" in pa:
+            pa["items"] = {
+                "anyOf": [
+                    pa["items"],
+                    _ref_node("id-reference")
+                ]
+            }
 
     return schema
 
@@ -626,13 +867,10 @@ def build_type_media_object(loader, bb_dir):
     """
     # Load physical mapping inline (used by dataCube and tabularData). Resolve
     # its external refs (definedTerm, concept) so none leak into the output.
-    pm_schema = loader.load("cdifDataType/cdifPhysicalMapping/cdifPhysicalMappingSchema.json")
-    pm_dir = bb_dir / "cdifDataType" / "cdifPhysicalMapping"
-    pm_schema = resolve_and_transform(pm_schema, pm_dir, loader)
-    pm_schema = strip_schema_key(pm_schema)
+    pm_schema = loader.resolve("cdifDataType/cdifPhysicalMapping/cdifPhysicalMappingSchema.json")
 
     # Load tabularData properties
-    tab_schema = loader.load("cdifDataType/cdifTabularData/CDIFTabularDataSchema.json")
+    tab_schema = _copy_json(loader.load("cdifDataType/cdifTabularData/CDIFTabularDataSchema.json"))
     tab_schema = strip_schema_key(tab_schema)
 
     # Base MediaObject properties (from cdifArchiveDistribution hasPart items)
@@ -649,7 +887,7 @@ def build_type_media_object(loader, bb_dir):
             },
             "@type": {
                 "type": "array",
-                "items": {"type": "string"},
+                "items": _STRING_NODE,
                 "contains": {"const": "schema:MediaObject"},
                 "not": {"contains": {"const": "schema:DataDownload"}},
                 "minItems": 1
@@ -658,35 +896,35 @@ def build_type_media_object(loader, bb_dir):
                 "type": "string",
                 "description": "Filename of the component file within the archive."
             },
-            "schema:description": {"type": "string"},
+            "schema:description": _STRING_NODE,
             "schema:encodingFormat": {
                 "type": "array",
-                "items": {"type": "string"}
+                "items": _STRING_NODE
             },
             "schema:size": {
                 "type": "object",
                 "properties": {
                     "@type": {"type": "string", "const": "schema:QuantitativeValue"},
                     "schema:value": {"type": "number"},
-                    "schema:unitText": {"type": "string"}
+                    "schema:unitText": _STRING_NODE
                 }
             },
             "schema:about": {
                 "type": "array",
                 "description": "For metadata sidecar files, references the data file this metadata describes.",
-                "items": {"$ref": "#/$defs/id-reference"}
+                "items": _ref_node("id-reference")
             },
             "spdx:checksum": {
                 "type": "object",
                 "properties": {
-                    "spdx:algorithm": {"type": "string"},
-                    "spdx:checksumValue": {"type": "string"}
+                    "spdx:algorithm": _STRING_NODE,
+                    "spdx:checksumValue": _STRING_NODE
                 }
             },
             # --- Optional cdifTabularData properties (from cdifTabularDataSchema) ---
             "cdi:arrayBase": {"type": "integer"},
-            "csvw:commentPrefix": {"type": "string"},
-            "csvw:delimiter": {"type": "string"},
+            "csvw:commentPrefix": _STRING_NODE,
+            "csvw:delimiter": _STRING_NODE,
             "csvw:header": {"type": "boolean"},
             "csvw:headerRowCount": {"type": "integer", "minimum": 0, "default": 1},
             "cdi:isDelimited": {"type": "boolean"},
@@ -727,35 +965,9 @@ def build_type_media_object(loader, bb_dir):
     return schema
 
 
-def build_type_web_api(loader, bb_dir):
-    """Build type-WebAPI definition."""
-    schema = loader.load("schemaorgProperties/webAPI/webAPISchema.json")
-    base_dir = bb_dir / "schemaorgProperties" / "webAPI"
-    schema = resolve_and_transform(schema, base_dir, loader)
-    schema = flatten_local_defs(schema)
-    schema = strip_schema_key(schema)
-    schema = ensure_id_property(schema)
-
-    # potentialAction items should allow id-reference
-    if "schema:potentialAction" in schema.get("properties", {}):
-        pa = schema["properties"]["schema:potentialAction"]
-        if "items" in pa:
-            pa["items"] = {
-                "anyOf": [
-                    pa["items"],
-                    {"$ref": "#/$defs/id-reference"}
-                ]
-            }
-
-    return schema
-
-
 def build_type_action(loader, bb_dir):
     """Build type-Action definition with inline sub-defs."""
-    schema = loader.load("schemaorgProperties/action/actionSchema.json")
-    base_dir = bb_dir / "schemaorgProperties" / "action"
-    schema = resolve_and_transform(schema, base_dir, loader)
-    schema = strip_schema_key(schema)
+    schema = loader.resolve("schemaorgProperties/action/actionSchema.json")
     schema = ensure_id_property(schema)
 
     # Keep internal $defs (target_type, result_type, query-input_type, object_type) inline
@@ -763,28 +975,14 @@ def build_type_action(loader, bb_dir):
     if "$defs" in schema:
         if "VariableMeasured" in schema["$defs"]:
             # Replace VariableMeasured reference with type ref
-            schema["$defs"]["VariableMeasured"] = {"$ref": "#/$defs/type-InstanceVariable"}
+            schema["$defs"]["VariableMeasured"] = _ref_node("type-InstanceVariable")
 
     return schema
 
 
-def build_type_place(loader, bb_dir):
-    """Build type-Place (spatialExtent) definition."""
-    schema = loader.load("schemaorgProperties/spatialExtent/spatialExtentSchema.json")
-    base_dir = bb_dir / "schemaorgProperties" / "spatialExtent"
-    schema = resolve_and_transform(schema, base_dir, loader)
-    schema = flatten_local_defs(schema)
-    schema = strip_schema_key(schema)
-    schema = ensure_id_property(schema)
-    return schema
-
-
 def build_type_proper_interval(loader, bb_dir):
     """Build type-ProperInterval (temporalExtent) definition with inline timePosition_type."""
-    schema = loader.load("schemaorgProperties/temporalExtent/temporalExtentSchema.json")
-    base_dir = bb_dir / "schemaorgProperties" / "temporalExtent"
-    schema = resolve_and_transform(schema, base_dir, loader)
-    schema = strip_schema_key(schema)
+    schema = loader.resolve("schemaorgProperties/temporalExtent/temporalExtentSchema.json")
     # timePosition_type stays inline in $defs
 
     # Wrap the anyOf at root level: the schema is an anyOf of object variants + string
@@ -795,265 +993,215 @@ def build_type_proper_interval(loader, bb_dir):
                 if "properties" not in variant:
                     variant["properties"] = {}
                 if "@id" not in variant["properties"]:
-                    variant["properties"]["@id"] = {"type": "string"}
+                    variant["properties"]["@id"] = _STRING_NODE
                 # Strip @context from the numeric-ages variant
                 variant.get("properties", {}).pop("@context", None)
 
     return schema
 
 
-def build_type_monetary_grant(loader, bb_dir):
-    """Build type-MonetaryGrant (funder) definition."""
-    schema = loader.load("schemaorgProperties/monetaryGrant/monetaryGrantSchema.json")
-    base_dir = bb_dir / "schemaorgProperties" / "monetaryGrant"
-    schema = resolve_and_transform(schema, base_dir, loader)
-    schema = flatten_local_defs(schema)
-    schema = strip_schema_key(schema)
-    schema = ensure_id_property(schema)
-    return schema
-
-
-def build_type_role(loader, bb_dir):
-    """Build type-Role (agentInRole) definition."""
-    schema = loader.load("schemaorgProperties/agentInRole/agentInRoleSchema.json")
-    base_dir = bb_dir / "schemaorgProperties" / "agentInRole"
-    schema = resolve_and_transform(schema, base_dir, loader)
-    schema = flatten_local_defs(schema)
-    schema = strip_schema_key(schema)
-    schema = ensure_id_property(schema)
-    return schema
-
-
 def build_type_activity(loader, bb_dir):
     """Build type-Activity from cdifProv (extended) or generatedBy (minimal fallback)."""
-    cdif_prov_path = bb_dir / "cdifDataType" / "cdifProvActivity" / "cdifProvActivitySchema.json"
-    if cdif_prov_path.is_file():
+    cdif_prov_path = _resolved_path(
+        loader.bb_dir, "cdifDataType/cdifProvActivity/cdifProvActivitySchema.json")
+    if loader.is_file(cdif_prov_path):
         # Load the base generatedBy schema directly (before resolve_and_transform
         # turns the $ref into a self-reference #/$defs/type-Activity)
-        base_schema = loader.load("provProperties/generatedBy/generatedBySchema.json")
+        base_schema = _copy_json(loader.load("provProperties/generatedBy/generatedBySchema.json"))
         base_schema = strip_schema_key(base_schema)
 
         # Load the extended cdifProvActivity schema (schema.org Action + prov:Activity)
-        schema = loader.load("cdifDataType/cdifProvActivity/cdifProvActivitySchema.json")
-        base_dir = bb_dir / "cdifDataType" / "cdifProvActivity"
-        schema = resolve_and_transform(schema, base_dir, loader)
+        schema = loader.resolve("cdifDataType/cdifProvActivity/cdifProvActivitySchema.json")
         schema = flatten_local_defs(schema)
-        schema = strip_schema_key(schema)
 
         # Merge: start with base generatedBy properties (@type, prov:used),
         # then overlay the extended cdifProv properties from allOf
-        merged_props = {}
-        for key, val in base_schema.get("properties", {}).items():
-            merged_props[key] = val
+        merged_props = dict(base_schema.get("properties", {}))
 
         # Extract extended properties from allOf items
         if "allOf" in schema:
-            remaining_allof = []
             for item in schema["allOf"]:
                 if isinstance(item, dict) and "properties" in item:
-                    for key, val in item["properties"].items():
-                        merged_props[key] = val
-                elif isinstance(item, dict) and "$ref" in item:
-                    ref = item["$ref"]
-                    if "type-Activity" in ref:
-                        continue  # skip self-reference (already merged base above)
-                    remaining_allof.append(item)
-                else:
-                    remaining_allof.append(item)
+                    merged_props.update(item["properties"])
+            # Keep the rest, minus the merged property blocks and the
+            # self-reference (base already merged above)
+            remaining_allof = [
+                item for item in schema["allOf"]
+                if not (isinstance(item, dict)
+                        and ("properties" in item
+                             or "type-Activity" in item.get("$ref", "")))
+            ]
             if remaining_allof:
                 schema["allOf"] = remaining_allof
             else:
                 schema.pop("allOf", None)
 
         # Also pick up any top-level properties
-        for key, val in schema.get("properties", {}).items():
-            if key not in merged_props:
-                merged_props[key] = val
+        merged_props.update((key, val) for key, val in schema.get("properties", {}).items()
+                            if key not in merged_props)
 
         schema["properties"] = merged_props
     else:
-        schema = loader.load("provProperties/generatedBy/generatedBySchema.json")
-        base_dir = bb_dir / "provProperties" / "generatedBy"
-        schema = resolve_and_transform(schema, base_dir, loader)
+        schema = loader.resolve("provProperties/generatedBy/generatedBySchema.json")
         schema = flatten_local_defs(schema)
-        schema = strip_schema_key(schema)
 
     schema = ensure_id_property(schema)
     return schema
 
 
-def build_type_howto(loader, bb_dir):
-    """Build type-HowTo definition for methodology/protocol references."""
-    schema = {
-        "type": "object",
-        "description": "A methodology or protocol described as a HowTo with optional steps.",
-        "properties": {
-            "@id": {"type": "string"},
-            "@type": {
-                "type": "string",
-                "const": "schema:HowTo"
-            },
-            "schema:name": {
-                "type": "string",
-                "description": "Name of the methodology or protocol"
-            },
-            "schema:description": {
-                "type": "string",
-                "description": "Description of the methodology"
-            },
-            "schema:url": {
-                "type": "string",
-                "format": "uri",
-                "description": "URL to a published methodology or protocol document"
-            },
-            "schema:step": {
-                "type": "array",
-                "description": "Ordered steps in this methodology",
-                "items": {
-                    "type": "object",
-                    "properties": {
-                        "@type": {
-                            "type": "string",
-                            "const": "schema:HowToStep"
-                        },
-                        "schema:name": {
-                            "type": "string",
-                            "description": "Name of this step"
-                        },
-                        "schema:description": {
-                            "type": "string",
-                            "description": "Description of what this step involves"
-                        },
-                        "schema:url": {
-                            "type": "string",
-                            "format": "uri"
-                        },
-                        "schema:position": {
-                            "type": "integer",
-                            "description": "Ordinal position of this step"
-                        }
+# Hand-written types with no building block source. Builders return a copy,
+# since the id-reference and @type passes edit definitions in place.
+_TYPE_HOWTO_SCHEMA = {
+    "type": "object",
+    "description": "A methodology or protocol described as a HowTo with optional steps.",
+    "properties": {
+        "@id": _STRING_NODE,
+        "@type": {
+            "type": "string",
+            "const": "schema:HowTo"
+        },
+        "schema:name": {
+            "type": "string",
+            "description": "Name of the methodology or protocol"
+        },
+        "schema:description": {
+            "type": "string",
+            "description": "Description of the methodology"
+        },
+        "schema:url": {
+            "type": "string",
+            "format": "uri",
+            "description": "URL to a published methodology or protocol document"
+        },
+        "schema:step": {
+            "type": "array",
+            "description": "Ordered steps in this methodology",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "@type": {
+                        "type": "string",
+                        "const": "schema:HowToStep"
                     },
-                    "required": ["@type", "schema:name"]
-                }
+                    "schema:name": {
+                        "type": "string",
+                        "description": "Name of this step"
+                    },
+                    "schema:description": {
+                        "type": "string",
+                        "description": "Description of what this step involves"
+                    },
+                    "schema:url": {
+                        "type": "string",
+                        "format": "uri"
+                    },
+                    "schema:position": {
+                        "type": "integer",
+                        "description": "Ordinal position of this step"
+                    }
+                },
+                "required": ["@type", "schema:name"]
             }
-        },
-        "required": ["@type"],
-        "anyOf": [
-            {"required": ["schema:name"]},
-            {"required": ["schema:url"]}
-        ]
-    }
-    return schema
+        }
+    },
+    "required": ["@type"],
+    "anyOf": [
+        {"required": ["schema:name"]},
+        {"required": ["schema:url"]}
+    ]
+}
 
 
-def build_type_claim(loader, bb_dir):
-    """Build type-Claim definition for quality or provenance assertions."""
-    schema = {
-        "type": "object",
-        "description": "A statement or assertion, such as a quality claim about a dataset.",
-        "properties": {
-            "@id": {"type": "string"},
-            "@type": {
-                "type": "string",
-                "const": "schema:Claim"
-            },
-            "schema:claimReviewed": {
-                "type": "string",
-                "description": "The claim being reviewed or asserted"
-            },
-            "schema:author": {
-                "description": "Author of this claim",
-                "anyOf": [
-                    {"$ref": "#/$defs/type-Person"},
-                    {"$ref": "#/$defs/type-Organization"},
-                    {"$ref": "#/$defs/id-reference"}
-                ]
-            },
-            "schema:datePublished": {
-                "type": "string",
-                "description": "ISO8601 date when this claim was published"
-            },
-            "schema:appearance": {
-                "description": "Where this claim appears",
-                "anyOf": [
-                    {"type": "string"},
-                    {"$ref": "#/$defs/type-CreativeWork"},
-                    {"$ref": "#/$defs/id-reference"}
-                ]
-            }
+def build_type_howto(loader, bb_dir):
+    """Build type-HowTo definition for methodology/protocol references."""
+    return _copy_json(_TYPE_HOWTO_SCHEMA)
+
+
+_TYPE_CLAIM_SCHEMA = {
+    "type": "object",
+    "description": "A statement or assertion, such as a quality claim about a dataset.",
+    "properties": {
+        "@id": _STRING_NODE,
+        "@type": {
+            "type": "string",
+            "const": "schema:Claim"
         },
-        "required": ["@type", "schema:claimReviewed"]
-    }
-    return schema
+        "schema:claimReviewed": {
+            "type": "string",
+            "description": "The claim being reviewed or asserted"
+        },
+        "schema:author": {
+            "description": "Author of this claim",
+            "anyOf": [
+                _ref_node("type-Person"),
+                _ref_node("type-Organization"),
+                _ref_node("id-reference")
+            ]
+        },
+        "schema:datePublished": {
+            "type": "string",
+            "description": "ISO8601 date when this claim was published"
+        },
+        "schema:appearance": {
+            "description": "Where this claim appears",
+            "anyOf": [
+                _STRING_NODE,
+                _ref_node("type-CreativeWork"),
+                _ref_node("id-reference")
+            ]
+        }
+    },
+    "required": ["@type", "schema:claimReviewed"]
+}
 
 
-def build_type_quality_measurement(loader, bb_dir):
-    """Build type-QualityMeasurement (qualityMeasure) definition."""
-    schema = loader.load("qualityProperties/qualityMeasure/qualityMeasureSchema.json")
-    base_dir = bb_dir / "qualityProperties" / "qualityMeasure"
-    schema = resolve_and_transform(schema, base_dir, loader)
-    schema = flatten_local_defs(schema)
-    schema = strip_schema_key(schema)
-    schema = ensure_id_property(schema)
-    return schema
+def build_type_claim(loader, bb_dir):
+    """Build type-Claim definition for quality or provenance assertions."""
+    return _copy_json(_TYPE_CLAIM_SCHEMA)
 
 
-def build_type_property_value(loader, bb_dir):
-    """Build type-PropertyValue (additionalProperty) definition."""
-    schema = loader.load("schemaorgProperties/additionalProperty/additionalPropertySchema.json")
-    base_dir = bb_dir / "schemaorgProperties" / "additionalProperty"
-    schema = resolve_and_transform(schema, base_dir, loader)
-    schema = flatten_local_defs(schema)
-    schema = strip_schema_key(schema)
-    schema = ensure_id_property(schema)
-    return schema
+# allOf $refs to variableMeasuredSchema, already merged into the
+# InstanceVariable properties; after resolution they become
+# #/$defs/type-InstanceVariable (self-ref)
+_INSTANCE_VARIABLE_SELF_REF = re.compile(r"variableMeasured|type-InstanceVariable")
 
 
 def build_type_instance_variable(loader, bb_dir):
     """Build type-InstanceVariable from cdifVariableMeasured + variableMeasured."""
     # Load the CDI extension
-    cdi_schema = loader.load("cdifDataType/cdifInstanceVariable/cdifInstanceVariableSchema.json")
-    cdi_dir = bb_dir / "cdifDataType" / "cdifInstanceVariable"
-    cdi_schema = resolve_and_transform(cdi_schema, cdi_dir, loader)
-    cdi_schema = strip_schema_key(cdi_schema)
+    cdi_schema = loader.resolve("cdifDataType/cdifInstanceVariable/cdifInstanceVariableSchema.json")
 
     # Load the base variableMeasured
-    base_schema = loader.load("schemaorgProperties/variableMeasured/variableMeasuredSchema.json")
-    base_dir_path = bb_dir / "schemaorgProperties" / "variableMeasured"
-    base_schema = resolve_and_transform(base_schema, base_dir_path, loader)
-    base_schema = strip_schema_key(base_schema)
+    base_schema = loader.resolve("schemaorgProperties/variableMeasured/variableMeasuredSchema.json")
 
     # Merge: the CDI schema has allOf[required, $ref to variableMeasured]
     # We'll build a merged definition with all properties from both
-    merged = {"type": "object", "properties": {}, "allOf": []}
-
-    # Copy base properties
-    for key, val in base_schema.get("properties", {}).items():
-        merged["properties"][key] = val
-
-    # Copy CDI properties (overrides @type)
-    for key, val in cdi_schema.get("properties", {}).items():
-        merged["properties"][key] = val
+    # Base properties first, then CDI properties (overrides @type). Both
+    # schemas are private copies from loader.resolve(), so their property
+    # schemas are shared into merged as-is.
+    merged = {
+        "type": "object",
+        "properties": {**base_schema.get("properties", {}),
+                       **cdi_schema.get("properties", {})},
+        "allOf": []
+    }
 
     # Merge $defs
-    merged_defs = {}
-    for d in [base_schema.get("$defs", {}), cdi_schema.get("$defs", {})]:
-        merged_defs.update(d)
+    merged_defs = {**base_schema.get("$defs", {}), **cdi_schema.get("$defs", {})}
     if merged_defs:
         merged["$defs"] = merged_defs
 
-    # Merge allOf constraints
-    for s in [base_schema, cdi_schema]:
-        for constraint in s.get("allOf", []):
-            if isinstance(constraint, dict):
-                ref = constraint.get("$ref", "")
-                # Skip $ref to variableMeasuredSchema (already merged into properties)
-                # After resolution this becomes #/$defs/type-InstanceVariable (self-ref)
-                if ref and ("variableMeasured" in ref or "type-InstanceVariable" in ref):
-                    continue
-                merged["allOf"].append(constraint)
-
-    if not merged["allOf"]:
+    # Merge allOf constraints, skipping the variableMeasured self-refs
+    merged_all_of = [
+        constraint
+        for s in (base_schema, cdi_schema)
+        for constraint in s.get("allOf", [])
+        if isinstance(constraint, dict)
+        and not _INSTANCE_VARIABLE_SELF_REF.search(constraint.get("$ref", ""))
+    ]
+    if merged_all_of:
+        merged["allOf"] = merged_all_of
+    else:
         del merged["allOf"]
 
     # Explicitly open-world: InstanceVariables routinely carry domain or DDI-CDI
@@ -1065,21 +1213,48 @@ def build_type_instance_variable(loader, bb_dir):
     return merged
 
 
-def build_type_catalog_record(loader, bb_dir):
-    """Build type-CatalogRecord from cdifCatalogRecord with @type changed to dcat:CatalogRecord."""
-    schema = loader.load("cdifDataType/cdifCatalogRecord/cdifCatalogRecordSchema.json")
-    base_dir = bb_dir / "cdifDataType" / "cdifCatalogRecord"
-    schema = resolve_and_transform(schema, base_dir, loader)
-    schema = flatten_local_defs(schema)
-    schema = strip_schema_key(schema)
-    schema = ensure_id_property(schema)
-
-    # The current cdifCatalogRecord is typed @type: [schema:Dataset] with
-    # schema:additionalType containing dcat:CatalogRecord (not @type:
-    # dcat:CatalogRecord). It is used nested under schema:subjectOf, so keep
-    # the source @type rather than forcing a dcat:CatalogRecord const.
-    # Keep conformsTo_item inline.
-    return schema
+# Dataset property overrides applied by build_type_dataset when the merged
+# profile defines the property: (name, shape, alternatives). shape is "array"
+# (array of anyOf items), "anyOf" (single value) or "list" (JSON-LD @list of
+# anyOf items); each alternative is a root $defs name, or "string" for a
+# bare string. Order is kept in the output.
+DATASET_PROPERTY_REWRITES = (
+    ("schema:distribution", "array", (
+        "type-DataDownload", "type-WebAPI", "type-StructuredDataSet",
+        "type-TabularTextDataSet", "type-LongStructureDataSet", "id-reference")),
+    ("schema:creator", "list", ("type-Person", "type-Organization", "id-reference")),
+    ("schema:contributor", "array", (
+        "type-Person", "type-Organization", "type-Role", "id-reference")),
+    ("schema:publisher", "anyOf", ("type-Person", "type-Organization", "id-reference")),
+    ("schema:provider", "array", ("type-Person", "type-Organization", "id-reference")),
+    ("schema:funding", "array", ("type-MonetaryGrant", "id-reference")),
+    ("schema:variableMeasured", "array", ("type-InstanceVariable", "id-reference")),
+    ("schema:spatialCoverage", "array", ("type-Place", "id-reference")),
+    ("schema:temporalCoverage", "array", ("type-ProperInterval", "string", "id-reference")),
+    ("prov:wasGeneratedBy", "array", ("type-Activity", "id-reference")),
+    # strings, @id refs and labeled links
+    ("prov:wasDerivedFrom", "array", ("string", "type-CreativeWork", "id-reference")),
+    ("dqv:hasQualityMeasurement", "array", ("type-QualityMeasurement", "id-reference")),
+    ("schema:identifier", "anyOf", ("type-Identifier", "string", "id-reference")),
+    ("schema:sameAs", "array", ("type-Identifier", "string", "id-reference")),
+    ("schema:additionalType", "array", ("string", "type-DefinedTerm", "id-reference")),
+    ("schema:keywords", "array", ("type-DefinedTerm", "string", "id-reference")),
+    ("schema:conditionsOfAccess", "array", ("string", "type-CreativeWork", "id-reference")),
+    ("schema:license", "array", ("string", "type-CreativeWork", "id-reference")),
+    ("schema:publishingPrinciples", "array", ("string", "type-CreativeWork", "id-reference")),
+)
+
+
+def _rewritten_property(shape, alternatives):
+    """Build a fresh property schema for a DATASET_PROPERTY_REWRITES entry."""
+    any_of = {"anyOf": [_STRING_NODE if alt == "string" else _ref_node(alt)
+                        for alt in alternatives]}
+    if shape == "anyOf":
+        return any_of
+    items = {"type": "array", "items": any_of}
+    if shape == "list":
+        return {"type": "object", "properties": {"@list": items}}
+    return items
 
 
 def build_type_dataset(loader, bb_dir):
@@ -1090,29 +1265,18 @@ def build_type_dataset(loader, bb_dir):
     cdifDiscovery (discovery extensions: variableMeasured, spatial/temporal
     coverage, quality). cdifDataDescription adds data-description constraints
     (variableMeasured required, distribution physical-mapping properties)."""
-    mandatory = loader.load("profiles/cdifProfile/cdifCore/cdifCoreSchema.json")
-    mandatory_dir = bb_dir / "profiles" / "cdifProfile" / "cdifCore"
-    mandatory = resolve_and_transform(mandatory, mandatory_dir, loader)
-    mandatory = strip_schema_key(mandatory)
+    mandatory = loader.resolve("profiles/cdifProfile/cdifCore/cdifCoreSchema.json")
 
-    optional = loader.load("profiles/cdifProfile/cdifDiscovery/cdifDiscoverySchema.json")
-    optional_dir = bb_dir / "profiles" / "cdifProfile" / "cdifDiscovery"
-    optional = resolve_and_transform(optional, optional_dir, loader)
-    optional = strip_schema_key(optional)
+    optional = loader.resolve("profiles/cdifProfile/cdifDiscovery/cdifDiscoverySchema.json")
 
     # Load cdifDataDescription for variableMeasured + distribution constraints
-    dd_rel = "profiles/cdifProfile/cdifDataDescription/cdifDataDescriptionSchema.json"
-    dd_dir = bb_dir / "profiles" / "cdifProfile" / "cdifDataDescription"
-    dd_schema = loader.load(dd_rel)
-    dd_schema = resolve_and_transform(dd_schema, dd_dir, loader)
-    dd_schema = strip_schema_key(dd_schema)
+    dd_schema = loader.resolve("profiles/cdifProfile/cdifDataDescription/cdifDataDescriptionSchema.json")
 
     # Merge all properties from core + discovery + data description
     merged = {"type": "object", "properties": {}}
 
     for src in [mandatory, optional, dd_schema]:
-        for key, val in src.get("properties", {}).items():
-            merged["properties"][key] = val
+        merged["properties"].update(src.get("properties", {}))
 
     # Merge $defs
     merged_defs = {}
@@ -1148,6 +1312,7 @@ def build_type_dataset(loader, bb_dir):
 
     # Ensure @id present
     merged = ensure_id_property(merged)
+    props = merged["properties"]
 
     # schema:subjectOf is the catalog record (type-CatalogRecord), or an @id
     # reference to one. Set this explicitly: the 3-way profile merge above lets
@@ -1156,289 +1321,39 @@ def build_type_dataset(loader, bb_dir):
     # catalog-record reference. Profile-version conformance is enforced by
     # ConformanceValidate, not the structural graph schema, so keep the
     # structural shape here.
-    merged["properties"]["schema:subjectOf"] = {
-        "anyOf": [
-            {"$ref": "#/$defs/type-CatalogRecord"},
-            {"$ref": "#/$defs/id-reference"}
-        ]
+    props["schema:subjectOf"] = {
+        "anyOf": [_ref_node("type-CatalogRecord"), _ref_node("id-reference")]
     }
 
-    # Modify schema:distribution items to allow id-references
-    if "schema:distribution" in merged.get("properties", {}):
-        merged["properties"]["schema:distribution"] = {
-            "type": "array",
-            "items": {
-                "anyOf": [
-                    {"$ref": "#/$defs/type-DataDownload"},
-                    {"$ref": "#/$defs/type-WebAPI"},
-                    {"$ref": "#/$defs/type-StructuredDataSet"},
-                    {"$ref": "#/$defs/type-TabularTextDataSet"},
-                    {"$ref": "#/$defs/type-LongStructureDataSet"},
-                    {"$ref": "#/$defs/id-reference"}
-                ]
-            }
-        }
-
-    # Modify schema:creator @list items to allow id-references
-    if "schema:creator" in merged.get("properties", {}):
-        merged["properties"]["schema:creator"] = {
-            "type": "object",
-            "properties": {
-                "@list": {
-                    "type": "array",
-                    "items": {
-                        "anyOf": [
-                            {"$ref": "#/$defs/type-Person"},
-                            {"$ref": "#/$defs/type-Organization"},
-                            {"$ref": "#/$defs/id-reference"}
-                        ]
-                    }
-                }
-            }
-        }
-
-    # Modify schema:contributor items to allow id-references
-    if "schema:contributor" in merged.get("properties", {}):
-        merged["properties"]["schema:contributor"] = {
-            "type": "array",
-            "items": {
-                "anyOf": [
-                    {"$ref": "#/$defs/type-Person"},
-                    {"$ref": "#/$defs/type-Organization"},
-                    {"$ref": "#/$defs/type-Role"},
-                    {"$ref": "#/$defs/id-reference"}
-                ]
-            }
-        }
-
-    # Modify schema:publisher
-    if "schema:publisher" in merged.get("properties", {}):
-        merged["properties"]["schema:publisher"] = {
-            "anyOf": [
-                {"$ref": "#/$defs/type-Person"},
-                {"$ref": "#/$defs/type-Organization"},
-                {"$ref": "#/$defs/id-reference"}
-            ]
-        }
-
-    # Modify schema:provider
-    if "schema:provider" in merged.get("properties", {}):
-        merged["properties"]["schema:provider"] = {
-            "type": "array",
-            "items": {
-                "anyOf": [
-                    {"$ref": "#/$defs/type-Person"},
-                    {"$ref": "#/$defs/type-Organization"},
-                    {"$ref": "#/$defs/id-reference"}
-                ]
-            }
-        }
-
-    # Modify schema:funding items
-    if "schema:funding" in merged.get("properties", {}):
-        merged["properties"]["schema:funding"] = {
-            "type": "array",
-            "items": {
-                "anyOf": [
-                    {"$ref": "#/$defs/type-MonetaryGrant"},
-                    {"$ref": "#/$defs/id-reference"}
-                ]
-            }
-        }
-
-    # Modify schema:variableMeasured items
-    if "schema:variableMeasured" in merged.get("properties", {}):
-        merged["properties"]["schema:variableMeasured"] = {
-            "type": "array",
-            "items": {
-                "anyOf": [
-                    {"$ref": "#/$defs/type-InstanceVariable"},
-                    {"$ref": "#/$defs/id-reference"}
-                ]
-            }
-        }
-
-    # Modify schema:spatialCoverage items
-    if "schema:spatialCoverage" in merged.get("properties", {}):
-        merged["properties"]["schema:spatialCoverage"] = {
-            "type": "array",
-            "items": {
-                "anyOf": [
-                    {"$ref": "#/$defs/type-Place"},
-                    {"$ref": "#/$defs/id-reference"}
-                ]
-            }
-        }
-
-    # Modify schema:temporalCoverage items
-    if "schema:temporalCoverage" in merged.get("properties", {}):
-        merged["properties"]["schema:temporalCoverage"] = {
-            "type": "array",
-            "items": {
-                "anyOf": [
-                    {"$ref": "#/$defs/type-ProperInterval"},
-                    {"type": "string"},
-                    {"$ref": "#/$defs/id-reference"}
-                ]
-            }
-        }
-
-    # Modify prov:wasGeneratedBy items
-    if "prov:wasGeneratedBy" in merged.get("properties", {}):
-        merged["properties"]["prov:wasGeneratedBy"] = {
-            "type": "array",
-            "items": {
-                "anyOf": [
-                    {"$ref": "#/$defs/type-Activity"},
-                    {"$ref": "#/$defs/id-reference"}
-                ]
-            }
-        }
-
-    # prov:wasDerivedFrom items - keep as-is (strings, @id refs, labeled links)
-    if "prov:wasDerivedFrom" in merged.get("properties", {}):
-        merged["properties"]["prov:wasDerivedFrom"] = {
-            "type": "array",
-            "items": {
-                "anyOf": [
-                    {"type": "string"},
-                    {"$ref": "#/$defs/type-CreativeWork"},
-                    {"$ref": "#/$defs/id-reference"}
-                ]
-            }
-        }
-
-    # dqv:hasQualityMeasurement items
-    if "dqv:hasQualityMeasurement" in merged.get("properties", {}):
-        merged["properties"]["dqv:hasQualityMeasurement"] = {
-            "type": "array",
-            "items": {
-                "anyOf": [
-                    {"$ref": "#/$defs/type-QualityMeasurement"},
-                    {"$ref": "#/$defs/id-reference"}
-                ]
-            }
-        }
-
-    # Modify schema:identifier to include id-reference
-    if "schema:identifier" in merged.get("properties", {}):
-        merged["properties"]["schema:identifier"] = {
-            "anyOf": [
-                {"$ref": "#/$defs/type-Identifier"},
-                {"type": "string"},
-                {"$ref": "#/$defs/id-reference"}
-            ]
-        }
-
-    # Modify schema:sameAs items to include id-reference for Identifiers
-    if "schema:sameAs" in merged.get("properties", {}):
-        merged["properties"]["schema:sameAs"] = {
-            "type": "array",
-            "items": {
-                "anyOf": [
-                    {"$ref": "#/$defs/type-Identifier"},
-                    {"type": "string"},
-                    {"$ref": "#/$defs/id-reference"}
-                ]
-            }
-        }
-
-    # schema:additionalType items
-    if "schema:additionalType" in merged.get("properties", {}):
-        merged["properties"]["schema:additionalType"] = {
-            "type": "array",
-            "items": {
-                "anyOf": [
-                    {"type": "string"},
-                    {"$ref": "#/$defs/type-DefinedTerm"},
-                    {"$ref": "#/$defs/id-reference"}
-                ]
-            }
-        }
-
-    # schema:keywords items
-    if "schema:keywords" in merged.get("properties", {}):
-        merged["properties"]["schema:keywords"] = {
-            "type": "array",
-            "items": {
-                "anyOf": [
-                    {"$ref": "#/$defs/type-DefinedTerm"},
-                    {"type": "string"},
-                    {"$ref": "#/$defs/id-reference"}
-                ]
-            }
-        }
-
-    # schema:conditionsOfAccess items
-    if "schema:conditionsOfAccess" in merged.get("properties", {}):
-        merged["properties"]["schema:conditionsOfAccess"] = {
-            "type": "array",
-            "items": {
-                "anyOf": [
-                    {"type": "string"},
-                    {"$ref": "#/$defs/type-CreativeWork"},
-                    {"$ref": "#/$defs/id-reference"}
-                ]
-            }
-        }
-
-    # schema:license items
-    if "schema:license" in merged.get("properties", {}):
-        merged["properties"]["schema:license"] = {
-            "type": "array",
-            "items": {
-                "anyOf": [
-                    {"type": "string"},
-                    {"$ref": "#/$defs/type-CreativeWork"},
-                    {"$ref": "#/$defs/id-reference"}
-                ]
-            }
-        }
-
-    # schema:publishingPrinciples items
-    if "schema:publishingPrinciples" in merged.get("properties", {}):
-        merged["properties"]["schema:publishingPrinciples"] = {
-            "type": "array",
-            "items": {
-                "anyOf": [
-                    {"type": "string"},
-                    {"$ref": "#/$defs/type-CreativeWork"},
-                    {"$ref": "#/$defs/id-reference"}
-                ]
-            }
-        }
+    # Widen agent, coverage, identifier etc. properties to accept the
+    # matching root type objects or @id references
+    for name, shape, alternatives in DATASET_PROPERTY_REWRITES:
+        if name in props:
+            props[name] = _rewritten_property(shape, alternatives)
 
     return merged
 
 
 def build_type_structured_dataset(loader, bb_dir):
     """Build type-StructuredDataSet: compose dataDownload + cdifDataCube."""
-    dd_schema = loader.load("schemaorgProperties/dataDownload/dataDownloadSchema.json")
-    dd_dir = bb_dir / "schemaorgProperties" / "dataDownload"
-    dd_schema = resolve_and_transform(dd_schema, dd_dir, loader)
-    dd_schema = strip_schema_key(dd_schema)
+    dd_schema = loader.resolve("schemaorgProperties/dataDownload/dataDownloadSchema.json")
 
-    cube_schema = loader.load("cdifDataType/cdifDataCube/cdifDataCubeSchema.json")
-    cube_dir = bb_dir / "cdifDataType" / "cdifDataCube"
-    cube_schema = resolve_and_transform(cube_schema, cube_dir, loader)
-    cube_schema = strip_schema_key(cube_schema)
+    cube_schema = loader.resolve("cdifDataType/cdifDataCube/cdifDataCubeSchema.json")
 
     # Merge: allOf [dataDownload properties, dataCube properties]
     merged = {"type": "object", "properties": {}}
 
     # Copy dataDownload properties
-    for key, val in dd_schema.get("properties", {}).items():
-        merged["properties"][key] = val
+    merged["properties"].update(dd_schema.get("properties", {}))
 
     # Copy dataCube properties (includes cdif:hasPhysicalMapping, resolved inline
     # from the cdifPhysicalMapping building block by resolve_and_transform)
-    for key, val in cube_schema.get("properties", {}).items():
-        merged["properties"][key] = val
+    merged["properties"].update(cube_schema.get("properties", {}))
 
     # Override @type to require both schema:DataDownload and cdi:StructuredDataSet
     merged["properties"]["@type"] = {
         "type": "array",
-        "items": {"type": "string"},
+        "items": _STRING_NODE,
         "allOf": [
             {"contains": {"const": "schema:DataDownload"}},
             {"contains": {"const": "cdi:StructuredDataSet"}}
@@ -1462,32 +1377,24 @@ def build_type_structured_dataset(loader, bb_dir):
 
 def build_type_tabular_text_dataset(loader, bb_dir):
     """Build type-TabularTextDataSet: compose dataDownload + cdifTabularData."""
-    dd_schema = loader.load("schemaorgProperties/dataDownload/dataDownloadSchema.json")
-    dd_dir = bb_dir / "schemaorgProperties" / "dataDownload"
-    dd_schema = resolve_and_transform(dd_schema, dd_dir, loader)
-    dd_schema = strip_schema_key(dd_schema)
-
-    tab_schema = loader.load("cdifDataType/cdifTabularData/CDIFTabularDataSchema.json")
-    tab_dir = bb_dir / "cdifDataType" / "cdifTabularData"
-    tab_schema = resolve_and_transform(tab_schema, tab_dir, loader)
-    tab_schema = strip_schema_key(tab_schema)
+    dd_schema = loader.resolve("schemaorgProperties/dataDownload/dataDownloadSchema.json")
+
+    tab_schema = loader.resolve("cdifDataType/cdifTabularData/CDIFTabularDataSchema.json")
 
     # Merge
     merged = {"type": "object", "properties": {}}
 
     # Copy dataDownload properties
-    for key, val in dd_schema.get("properties", {}).items():
-        merged["properties"][key] = val
+    merged["properties"].update(dd_schema.get("properties", {}))
 
     # Copy tabularData properties (includes cdif:hasPhysicalMapping, resolved
     # inline from the cdifPhysicalMapping building block)
-    for key, val in tab_schema.get("properties", {}).items():
-        merged["properties"][key] = val
+    merged["properties"].update(tab_schema.get("properties", {}))
 
     # Override @type to require both schema:DataDownload and cdi:TabularTextDataSet
     merged["properties"]["@type"] = {
         "type": "array",
-        "items": {"type": "string"},
+        "items": _STRING_NODE,
         "allOf": [
             {"contains": {"const": "schema:DataDownload"}},
             {"contains": {"const": "cdi:TabularTextDataSet"}}
@@ -1515,33 +1422,25 @@ def build_type_tabular_text_dataset(loader, bb_dir):
 
 def build_type_long_structure_dataset(loader, bb_dir):
     """Build type-LongStructureDataSet: compose dataDownload + cdifLongData."""
-    dd_schema = loader.load("schemaorgProperties/dataDownload/dataDownloadSchema.json")
-    dd_dir = bb_dir / "schemaorgProperties" / "dataDownload"
-    dd_schema = resolve_and_transform(dd_schema, dd_dir, loader)
-    dd_schema = strip_schema_key(dd_schema)
+    dd_schema = loader.resolve("schemaorgProperties/dataDownload/dataDownloadSchema.json")
 
-    long_schema = loader.load("cdifDataType/cdifLongData/cdifLongDataSchema.json")
-    long_dir = bb_dir / "cdifDataType" / "cdifLongData"
-    long_schema = resolve_and_transform(long_schema, long_dir, loader)
-    long_schema = strip_schema_key(long_schema)
+    long_schema = loader.resolve("cdifDataType/cdifLongData/cdifLongDataSchema.json")
 
     # Merge
     merged = {"type": "object", "properties": {}}
 
     # Copy dataDownload properties
-    for key, val in dd_schema.get("properties", {}).items():
-        merged["properties"][key] = val
+    merged["properties"].update(dd_schema.get("properties", {}))
 
     # Copy longData properties (includes cdif:hasPhysicalMapping, resolved inline
     # from the cdifPhysicalMapping building block; descriptor/reference roles are
     # carried by cdif:role on the InstanceVariables in schema:variableMeasured)
-    for key, val in long_schema.get("properties", {}).items():
-        merged["properties"][key] = val
+    merged["properties"].update(long_schema.get("properties", {}))
 
     # Override @type to require both schema:DataDownload and cdi:LongStructureDataSet
     merged["properties"]["@type"] = {
         "type": "array",
-        "items": {"type": "string"},
+        "items": _STRING_NODE,
         "allOf": [
             {"contains": {"const": "schema:DataDownload"}},
             {"contains": {"const": "cdi:LongStructureDataSet"}}
@@ -1563,6 +1462,61 @@ def build_type_long_structure_dataset(loader, bb_dir):
     return merged
 
 
+def _standard_type(rel_path, post=None):
+    """Return a builder(loader, bb_dir) running build_standard_type on the
+    building block at `rel_path`, with optional post-processor `post`."""
+    def build(loader, bb_dir):
+        return build_standard_type(loader, rel_path, post)
+    return build
+
+
+# Build order = output $defs order. Each entry: (defs name, builder), where
+# builder(loader, bb_dir) returns the type definition -- _standard_type() for
+# types taken from a single building block, build_type_*() for types composed
+# from several.
+TYPE_BUILD_SPECS = [
+    ("type-Person", _standard_type("schemaorgProperties/person/personSchema.json")),
+    ("type-Organization", _standard_type("schemaorgProperties/organization/organizationSchema.json")),
+    ("type-Identifier", _standard_type("schemaorgProperties/identifier/identifierSchema.json", _identifier_post)),
+    ("type-DefinedTerm", _standard_type("schemaorgProperties/definedTerm/definedTermSchema.json")),
+    ("type-CreativeWork", _standard_type("schemaorgProperties/labeledLink/labeledLinkSchema.json")),
+    ("type-DataDownload", _standard_type("schemaorgProperties/dataDownload/dataDownloadSchema.json", _data_download_post)),
+    ("type-MediaObject", build_type_media_object),
+    ("type-WebAPI", _standard_type("schemaorgProperties/webAPI/webAPISchema.json", _web_api_post)),
+    ("type-Action", build_type_action),
+    ("type-Place", _standard_type("schemaorgProperties/spatialExtent/spatialExtentSchema.json")),
+    ("type-ProperInterval", build_type_proper_interval),
+    ("type-MonetaryGrant", _standard_type("schemaorgProperties/monetaryGrant/monetaryGrantSchema.json")),
+    ("type-Role", _standard_type("schemaorgProperties/agentInRole/agentInRoleSchema.json")),
+    ("type-Activity", build_type_activity),
+    ("type-HowTo", build_type_howto),
+    ("type-Claim", build_type_claim),
+    ("type-QualityMeasurement", _standard_type("qualityProperties/qualityMeasure/qualityMeasureSchema.json")),
+    ("type-PropertyValue", _standard_type("schemaorgProperties/additionalProperty/additionalPropertySchema.json")),
+    ("type-InstanceVariable", build_type_instance_variable),
+    # cdifCatalogRecord is typed @type: [schema:Dataset] with
+    # schema:additionalType containing dcat:CatalogRecord and is used nested
+    # under schema:subjectOf, so keep its source @type (and conformsTo_item).
+    ("type-CatalogRecord", _standard_type("cdifDataType/cdifCatalogRecord/cdifCatalogRecordSchema.json")),
+    ("type-Dataset", build_type_dataset),
+    ("type-StructuredDataSet", build_type_structured_dataset),
+    ("type-TabularTextDataSet", build_type_tabular_text_dataset),
+    ("type-LongStructureDataSet", build_type_long_structure_dataset),
+]
+
+
+def build_all_types(loader, bb_dir):
+    """Build every type definition in TYPE_BUILD_SPECS against one shared
+    loader and return them keyed by name. Building blocks used by several
+    types (e.g. dataDownload) are resolved once via loader.resolve().
+    """
+    defs = {}
+    for name, builder in TYPE_BUILD_SPECS:
+        print(f"  {name}...")
+        defs[name] = builder(loader, bb_dir)
+    return defs
+
+
 # ---------------------------------------------------------------------------
 # Phase 5: Assemble output schema
 # ---------------------------------------------------------------------------
@@ -1609,7 +1563,7 @@ def build_root_object_dispatch(type_dispatch):
             condition = build_dispatch_condition(dispatch_type)
         branches.append({
             "if": condition,
-            "then": {"$ref": f"#/$defs/{defs_name}"},
+            "then": _ref_node(defs_name),
             "else": False
         })
 
@@ -1630,108 +1584,260 @@ def promote_internal_defs(defs):
     those must be promoted to the root $defs with qualified names, and all
     internal refs rewritten accordingly.
 
-    Runs iteratively until no more internal $defs remain, handling cases where
-    promoted defs themselves contain $defs (e.g., instrument building block
-    promoted from type-Activity has its own Identifier/AdditionalProperty $defs).
+    Promoted defs go on a FIFO worklist, so those with $defs of their own
+    (e.g. instrument building block promoted from type-Activity has its own
+    Identifier/AdditionalProperty $defs) are handled in turn. A promoted def
+    is rewritten with the mappings of every def it was promoted through,
+    then its own, composed in that order; each def is walked once.
     """
-    changed = True
-    while changed:
-        changed = False
-        promoted = {}
-        for type_name, type_schema in list(defs.items()):
-            if not isinstance(type_schema, dict):
-                continue
-            internal_defs = type_schema.get("$defs", {})
-            if not internal_defs:
-                continue
-
-            changed = True
-
-            # Build a mapping from old refs to new qualified names
-            ref_mapping = {}
-            for def_name, def_schema in list(internal_defs.items()):
-                # Skip defs that are already just redirects to root-level type defs
-                if (isinstance(def_schema, dict) and "$ref" in def_schema
-                        and def_schema["$ref"].startswith("#/$defs/type-")):
+    # (name, schema, mappings inherited from the defs it was promoted from)
+    worklist = deque((name, schema, ()) for name, schema in defs.items())
+    while worklist:
+        type_name, type_schema, inherited = worklist.popleft()
+        if not isinstance(type_schema, dict):
+            continue
+        internal_defs = type_schema.pop("$defs", None) or {}
+
+        # Build a mapping from old refs to new qualified names
+        ref_mapping = {}
+        promoted = []
+        for def_name, def_schema in internal_defs.items():
+            # Skip defs that are already just redirects to root-level type defs
+            # (possibly once the inherited mappings are applied)
+            if isinstance(def_schema, dict) and "$ref" in def_schema:
+                target = def_schema["$ref"]
+                for mapping in inherited:
+                    target = mapping.get(target, target)
+                if target.startswith(_TYPE_REF_PREFIX):
                     # This is already pointing to a root type; just rewrite refs to it
-                    ref_mapping[f"#/$defs/{def_name}"] = def_schema["$ref"]
+                    ref_mapping[_DEFS_PREFIX + def_name] = target
                     continue
 
-                qualified_name = f"{type_name}--{def_name}"
-                ref_mapping[f"#/$defs/{def_name}"] = f"#/$defs/{qualified_name}"
-                promoted[qualified_name] = def_schema
-
-            # Remove the internal $defs from the type schema
-            del type_schema["$defs"]
+            qualified_name = type_name + "--" + def_name
+            ref_mapping[_DEFS_PREFIX + def_name] = _DEFS_PREFIX + qualified_name
+            promoted.append((qualified_name, def_schema))
 
-            # Rewrite all refs within this type schema
-            _replace_refs(type_schema, ref_mapping)
+        # Rewrite all refs within this schema, then queue the defs promoted
+        # from it for their own rewrite and $defs
+        mappings = inherited + (ref_mapping,) if ref_mapping else inherited
+        if mappings:
+            _replace_refs(type_schema, *mappings)
+        for qualified_name, def_schema in promoted:
+            defs[qualified_name] = def_schema
+            worklist.append((qualified_name, def_schema, mappings))
 
-            # Also rewrite refs within the promoted defs themselves
-            for qname, qschema in promoted.items():
-                if qname.startswith(f"{type_name}--"):
-                    _replace_refs(qschema, ref_mapping)
+    return defs
 
-        # Add all promoted defs to root
-        defs.update(promoted)
 
-    return defs
+def dedup_promoted_defs(defs):
+    """
+    Merge promoted defs (qualified `type-X--name`) whose bodies are identical:
+    keep the first, drop the rest and point their $refs at the one kept.
+    Repeats until stable, since merging nested defs can make their parents
+    identical. Returns the number of defs removed.
 
+    Shrinks the schema when several types promote the same building-block
+    fragment; off by default (see --dedup-defs).
+    """
+    removed = 0
+    while True:
+        # Exact canonical text as the key; no hashing, so no collisions
+        first = {}
+        mapping = {}
+        for name, body in defs.items():
+            if "--" not in name:
+                continue
+            kept = first.setdefault(_canonical_json(body), name)
+            if kept != name:
+                mapping[_DEFS_PREFIX + name] = _DEFS_PREFIX + kept
+        if not mapping:
+            return removed
+        for ref in mapping:
+            del defs[ref[len(_DEFS_PREFIX):]]
+        _replace_refs(defs, mapping)
+        removed += len(mapping)
+
+
+def _canonical_json(obj):
+    """Key-sorted compact JSON for comparing schema bodies."""
+    if HAS_ORJSON:
+        return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS)
+    return json.dumps(obj, sort_keys=True, separators=(",", ":"),
+                      ensure_ascii=False).encode("utf-8")
+
+
+def inline_low_fanout_refs(defs, max_uses):
+    """
+    Replace bare `{"$ref": "#/$defs/type-X"}` usages with a copy of type-X's
+    body when type-X is referenced at most `max_uses` times and cannot reach
+    itself through further type refs. The type-X definition is kept, since the
+    root dispatch still targets it. Returns the set of inlined type names.
 
-def build_output_schema(defs, type_dispatch):
-    """Assemble the complete output schema."""
-    root_object = build_root_object_dispatch(type_dispatch)
+    Inlining nests: a copied body has its own inlinable refs substituted too,
+    and a type's uses include the ones each copy of an inlined referrer adds,
+    so the limit applies to the refs left in the final schema.
 
-    # Context schema for root-graph
-    context_schema = {
-        "type": "object",
-        "properties": {
-            "schema": {"const": "http://schema.org/"},
-            "dcterms": {"const": "http://purl.org/dc/terms/"},
-            "geosparql": {"const": "http://www.opengis.net/ont/geosparql#"},
-            "spdx": {"const": "http://spdx.org/rdf/terms#"},
-            "cdi": {"const": "http://ddialliance.org/Specification/DDI-CDI/1.0/RDF/"},
-            "csvw": {"const": "http://www.w3.org/ns/csvw#"},
-            "prov": {"const": "http://www.w3.org/ns/prov#"},
-            "dcat": {"const": "http://www.w3.org/ns/dcat#"},
-            "dqv": {"const": "http://www.w3.org/ns/dqv#"},
-            "time": {"const": "http://www.w3.org/2006/time#"}
-        },
-        "required": ["schema", "dcterms"],
-        "additionalProperties": True
+    Trades schema size for fewer $ref hops in validators that compile the
+    schema; off by default (see --inline-max-refs).
+    """
+    edges = {}
+    for name, body in defs.items():
+        targets = set()
+        for ref in _collect_refs(body):
+            if ref.startswith(_TYPE_REF_PREFIX):
+                targets.add(ref[len(_DEFS_PREFIX):])
+        edges[name] = targets
+    # def name -> Counter of the type defs its bare refs point at
+    bare = {
+        name: Counter(ref[len(_DEFS_PREFIX):] for ref in _iter_bare_refs(body)
+                      if ref.startswith(_TYPE_REF_PREFIX))
+        for name, body in defs.items()
     }
+    uses = Counter()
+    for targets in bare.values():
+        uses.update(targets)
+
+    def reaches_self(start):
+        seen = set()
+        pending = list(edges.get(start, ()))
+        while pending:
+            name = pending.pop()
+            if name == start:
+                return True
+            if name in seen:
+                continue
+            seen.add(name)
+            pending.extend(edges.get(name, ()))
+        return False
 
-    # id-reference definition
-    id_reference = {
-        "type": "object",
-        "required": ["@id"],
-        "properties": {
-            "@id": {"type": "string"}
-        },
-        "additionalProperties": False
+    candidates = {
+        name for name in uses if name in defs and not reaches_self(name)
     }
 
-    # root-array: array of root-objects
-    root_array = {
-        "type": "array",
-        "items": {"$ref": "#/$defs/root-object"}
-    }
+    # Referrers before the types they refer to (refs between candidates
+    # form a DAG, since none can reach itself), so every copy of a type's
+    # referrers is known by the time its own uses are counted
+    indegree = dict.fromkeys(candidates, 0)
+    for name in candidates:
+        for target in bare[name]:
+            if target in indegree:
+                indegree[target] += 1
+    ready = sorted((name for name, n in indegree.items() if n == 0),
+                   reverse=True)
+    order = []
+    while ready:
+        name = ready.pop()
+        order.append(name)
+        for target in sorted(bare[name], reverse=True):
+            if target in indegree:
+                indegree[target] -= 1
+                if indegree[target] == 0:
+                    ready.append(target)
+
+    copies = {}  # inlined name -> number of copies of its body
+    for name in order:
+        count = uses[name] + sum(
+            n * bare[referrer][name] for referrer, n in copies.items()
+        )
+        if count <= max_uses:
+            copies[name] = count
+    if not copies:
+        return set()
+
+    mapping = {}
+
+    def substitute(obj):
+        if isinstance(obj, list):
+            return [substitute(item) for item in obj]
+        if not isinstance(obj, dict):
+            return obj
+        if len(obj) == 1 and obj.get("$ref") in mapping:
+            return _copy_json(mapping[obj["$ref"]])
+        return {key: substitute(value) for key, value in obj.items()}
+
+    # Expand bodies from the innermost types out, so each copied body is
+    # already fully substituted
+    for name in reversed(order):
+        if name in copies:
+            defs[name] = substitute(defs[name])
+            mapping[_DEFS_PREFIX + name] = defs[name]
+    for name in list(defs):
+        if name not in copies:
+            defs[name] = substitute(defs[name])
+    return set(copies)
+
+
+def _iter_bare_refs(obj):
+    """Yield the $ref of every single-key `{"$ref": ...}` dict in obj."""
+    stack = [obj]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            if len(node) == 1 and isinstance(node.get("$ref"), str):
+                yield node["$ref"]
+            stack.extend(node.values())
+        elif isinstance(node, list):
+            stack.extend(node)
+
+
+# Fixed structural definitions added by build_output_schema. Shared, not
+# copied: nothing edits the schema once it is assembled.
+
+# Context schema for root-graph
+_CONTEXT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "schema": {"const": "http://schema.org/"},
+        "dcterms": {"const": "http://purl.org/dc/terms/"},
+        "geosparql": {"const": "http://www.opengis.net/ont/geosparql#"},
+        "spdx": {"const": "http://spdx.org/rdf/terms#"},
+        "cdi": {"const": "http://ddialliance.org/Specification/DDI-CDI/1.0/RDF/"},
+        "csvw": {"const": "http://www.w3.org/ns/csvw#"},
+        "prov": {"const": "http://www.w3.org/ns/prov#"},
+        "dcat": {"const": "http://www.w3.org/ns/dcat#"},
+        "dqv": {"const": "http://www.w3.org/ns/dqv#"},
+        "time": {"const": "http://www.w3.org/2006/time#"}
+    },
+    "required": ["schema", "dcterms"],
+    "additionalProperties": True
+}
 
-    # root-graph: object with @context and @graph
-    root_graph = {
-        "type": "object",
-        "required": ["@context", "@graph"],
-        "properties": {
-            "@context": context_schema,
-            "@graph": {"$ref": "#/$defs/root-array"}
-        }
+# id-reference definition
+_ID_REFERENCE_SCHEMA = {
+    "type": "object",
+    "required": ["@id"],
+    "properties": {
+        "@id": _STRING_NODE
+    },
+    "additionalProperties": False
+}
+
+# root-array: array of root-objects
+_ROOT_ARRAY_SCHEMA = {
+    "type": "array",
+    "items": _ref_node("root-object")
+}
+
+# root-graph: object with @context and @graph
+_ROOT_GRAPH_SCHEMA = {
+    "type": "object",
+    "required": ["@context", "@graph"],
+    "properties": {
+        "@context": _CONTEXT_SCHEMA,
+        "@graph": _ref_node("root-array")
     }
+}
+
+
+def build_output_schema(defs, type_dispatch):
+    """Assemble the complete output schema."""
+    root_object = build_root_object_dispatch(type_dispatch)
 
     # Add structural definitions
     defs["root-object"] = root_object
-    defs["root-array"] = root_array
-    defs["root-graph"] = root_graph
-    defs["id-reference"] = id_reference
+    defs["root-array"] = _ROOT_ARRAY_SCHEMA
+    defs["root-graph"] = _ROOT_GRAPH_SCHEMA
+    defs["id-reference"] = _ID_REFERENCE_SCHEMA
 
     # Safety net: some building blocks reference internal $defs of inlined
     # sub-schemas (e.g. cdifPhysicalMapping's cdifConceptOrTerm, cdifStatistics'
@@ -1759,11 +1865,11 @@ def build_output_schema(defs, type_dispatch):
         "if": {"type": "object"},
         "then": {
             "anyOf": [
-                {"$ref": "#/$defs/root-graph"},
-                {"$ref": "#/$defs/root-object"}
+                _ref_node("root-graph"),
+                _ref_node("root-object")
             ]
         },
-        "else": {"$ref": "#/$defs/root-array"},
+        "else": _ref_node("root-array"),
         "$defs": defs
     }
 
@@ -1788,6 +1894,19 @@ def main():
         help="Output schema file path",
         default=None,
     )
+    parser.add_argument(
+        "--inline-max-refs",
+        type=int,
+        default=0,
+        metavar="N",
+        help="Inline non-recursive type definitions referenced at most N times "
+             "instead of emitting $refs (default: 0, never inline)",
+    )
+    parser.add_argument(
+        "--dedup-defs",
+        action="store_true",
+        help="Merge identical promoted internal $defs (type-X--name) into one",
+    )
     args = parser.parse_args()
 
     # Find building blocks directory
@@ -1807,41 +1926,7 @@ def main():
 
     # Phase 3 & 4: Build all type definitions
     print("Building type definitions...")
-    defs = {}
-
-    builders = {
-        "type-Person": build_type_person,
-        "type-Organization": build_type_organization,
-        "type-Identifier": build_type_identifier,
-        "type-DefinedTerm": build_type_defined_term,
-        "type-CreativeWork": build_type_creative_work,
-        "type-DataDownload": build_type_data_download,
-        "type-MediaObject": build_type_media_object,
-        "type-WebAPI": build_type_web_api,
-        "type-Action": build_type_action,
-        "type-Place": build_type_place,
-        "type-ProperInterval": build_type_proper_interval,
-        "type-MonetaryGrant": build_type_monetary_grant,
-        "type-Role": build_type_role,
-        "type-Activity": build_type_activity,
-        "type-HowTo": build_type_howto,
-        "type-Claim": build_type_claim,
-        "type-QualityMeasurement": build_type_quality_measurement,
-        "type-PropertyValue": build_type_property_value,
-        "type-InstanceVariable": build_type_instance_variable,
-        "type-CatalogRecord": build_type_catalog_record,
-        "type-Dataset": build_type_dataset,
-        "type-StructuredDataSet": build_type_structured_dataset,
-        "type-TabularTextDataSet": build_type_tabular_text_dataset,
-        "type-LongStructureDataSet": build_type_long_structure_dataset,
-    }
-
-    for name, builder in builders.items():
-        print(f"  {name}...")
-        if name == "type-MediaObject":
-            defs[name] = builder(loader, bb_dir)
-        else:
-            defs[name] = builder(loader, bb_dir)
+    defs = build_all_types(loader, bb_dir)
 
     # Relax each type def's @type to accept string-or-array (flattened nodes
     # may carry @type as a bare string; dispatch already routed by @type).
@@ -1859,28 +1944,36 @@ def main():
     print("Promoting internal $defs to root level...")
     defs = promote_internal_defs(defs)
 
+    if args.dedup_defs:
+        removed = dedup_promoted_defs(defs)
+        print(f"Merged {removed} duplicate promoted $def(s)")
+
+    if args.inline_max_refs > 0:
+        inlined = inline_low_fanout_refs(defs, args.inline_max_refs)
+        print(f"Inlined {len(inlined)} low-fanout type definition(s): "
+              f"{', '.join(sorted(inlined)) or '(none)'}")
+
     # Phase 5: Assemble
     print("Assembling output schema...")
     output = build_output_schema(defs, TYPE_DISPATCH)
 
     # Write output
     print(f"Writing {output_path}...")
-    with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(output, f, indent=4, ensure_ascii=False)
+    write_json(output, output_path)
 
     print(f"Done. Output: {output_path}")
 
     # Basic validation: check all $ref targets exist
     print("Validating internal references...")
     all_refs = _collect_refs(output)
-    all_defs = set(f"#/$defs/{name}" for name in output.get("$defs", {}))
+    root_defs = set(output.get("$defs", {}))
     missing = set()
     for ref in all_refs:
-        if ref.startswith("#/$defs/") and ref not in all_defs:
-            # Check if it's a sub-path within a $defs entry (e.g. #/$defs/type-Action/$defs/...)
-            parts = ref.split("/")
-            if len(parts) >= 4 and f"#/$defs/{parts[2]}" in all_defs:
-                continue
+        if not ref.startswith("#/$defs/"):
+            continue
+        # Resolved if the first segment names a root $defs entry; covers
+        # sub-paths within one too (e.g. #/$defs/type-Action/$defs/...)
+        if ref[8:].partition("/")[0] not in root_defs:
             missing.add(ref)
     if missing:
         print(f"WARNING: {len(missing)} unresolved $ref(s):")
@@ -1914,14 +2007,16 @@ def _stub_missing_defs(defs):
 def _collect_refs(obj):
     """Collect all $ref values in a schema."""
     refs = set()
-    if isinstance(obj, dict):
-        if "$ref" in obj:
-            refs.add(obj["$ref"])
-        for v in obj.values():
-            refs.update(_collect_refs(v))
-    elif isinstance(obj, list):
-        for item in obj:
-            refs.update(_collect_refs(item))
+    stack = [obj]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            ref = node.get("$ref")
+            if ref is not None:
+                refs.add(ref)
+            stack.extend(v for v in node.values() if isinstance(v, (dict, list)))
+        elif isinstance(node, list):
+            stack.extend(v for v in node if isinstance(v, (dict, list)))
     return refs
 
 